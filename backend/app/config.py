@@ -2,7 +2,9 @@
 Configuration settings for DOSM scraper
 """
 import os
-from typing import List
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Pattern
 from app.schemas.scraper_config import ScraperConfig
 
 # DOSM Official Domains (whitelist)
@@ -14,61 +16,132 @@ DOSM_OFFICIAL_DOMAINS: List[str] = [
     "data.gov.my"  # Malaysian government data portal
 ]
 
+# Compiled once at import: exact-match set plus a single suffix regex for subdomains
+DOSM_OFFICIAL_DOMAINS_SET: FrozenSet[str] = frozenset(DOSM_OFFICIAL_DOMAINS)
+DOSM_OFFICIAL_DOMAIN_RE: Pattern[str] = re.compile(
+    r"(?:^|\.)(?:"
+    + "|".join(map(re.escape, sorted(DOSM_OFFICIAL_DOMAINS, key=len, reverse=True)))
+    + r")$"
+)
+
 # Load configuration from environment or use defaults
+# Cached: environment is read once per process (see reset_config_cache for tests)
+@lru_cache(maxsize=1)
 def get_scraper_config() -> ScraperConfig:
     """Get scraper configuration from environment variables or defaults"""
+    env = os.environ
     return ScraperConfig(
-        base_url_opendosm=os.getenv("DOSM_OPENDOSM_URL", "https://open.dosm.gov.my"),
-        base_url_statsdw=os.getenv("DOSM_STATSDW_URL", "https://statsdw.dosm.gov.my"),
-        base_url_main=os.getenv("DOSM_MAIN_URL", "https://www.dosm.gov.my"),
-        rate_limit_requests_per_minute=int(os.getenv("DOSM_RATE_LIMIT", "30")),
-        max_retries=int(os.getenv("DOSM_MAX_RETRIES", "3")),
-        retry_backoff_factor=float(os.getenv("DOSM_RETRY_BACKOFF", "2.0")),
-        request_timeout_seconds=int(os.getenv("DOSM_TIMEOUT", "60")),
-        enable_browser_automation=os.getenv("DOSM_ENABLE_BROWSER_AUTOMATION", "false").lower() == "true"
+        base_url_opendosm=env.get("DOSM_OPENDOSM_URL", "https://open.dosm.gov.my"),
+        base_url_statsdw=env.get("DOSM_STATSDW_URL", "https://statsdw.dosm.gov.my"),
+        base_url_main=env.get("DOSM_MAIN_URL", "https://www.dosm.gov.my"),
+        rate_limit_requests_per_minute=int(env.get("DOSM_RATE_LIMIT", "30")),
+        max_retries=int(env.get("DOSM_MAX_RETRIES", "3")),
+        retry_backoff_factor=float(env.get("DOSM_RETRY_BACKOFF", "2.0")),
+        request_timeout_seconds=int(env.get("DOSM_TIMEOUT", "60")),
+        enable_browser_automation=env.get("DOSM_ENABLE_BROWSER_AUTOMATION", "false").lower() == "true",
+        catalog_cache_ttl_seconds=int(env.get("DOSM_CATALOG_CACHE_TTL", "900"))
     )
 
-# Global config instance
+# Global config instance (built once at import)
 scraper_config = get_scraper_config()
 
-# Confidence thresholds based on tier
-TIER_CONFIDENCE_MAP = {
-    "tier1_opendosm": "high",
-    "tier2_direct_download": "high",
-    "tier3_pdf_extraction": "medium",
-    "tier4_html_parsing": "medium",
-    "tier5_browser_automation": "low"
-}
+# Per-tier metadata: (confidence, file_type, scrape_method) resolved with a single lookup
+class TierMeta(NamedTuple):
+    confidence: str
+    file_type: str
+    scrape_method: str
 
-# File type mapping based on tier
-TIER_FILE_TYPE_MAP = {
-    "tier1_opendosm": "api",
-    "tier2_direct_download": "csv",  # or xlsx, determined at runtime
-    "tier3_pdf_extraction": "pdf",
-    "tier4_html_parsing": "html",
-    "tier5_browser_automation": "html"
-}
 
-# Scrape method mapping based on tier
-TIER_SCRAPE_METHOD_MAP = {
-    "tier1_opendosm": "opendosm_api",
-    "tier2_direct_download": "direct_download",
-    "tier3_pdf_extraction": "pdf_extraction",
-    "tier4_html_parsing": "html_parsing",
-    "tier5_browser_automation": "browser_automation"
+TIER_META: Dict[str, TierMeta] = {
+    "tier1_opendosm": TierMeta("high", "api", "opendosm_api"),
+    "tier2_direct_download": TierMeta("high", "csv", "direct_download"),  # csv or xlsx, determined at runtime
+    "tier3_pdf_extraction": TierMeta("medium", "pdf", "pdf_extraction"),
+    "tier4_html_parsing": TierMeta("medium", "html", "html_parsing"),
+    "tier5_browser_automation": TierMeta("low", "html", "browser_automation"),
 }
 
+# Unknown tiers are treated like HTML parsing
+DEFAULT_TIER_META = TIER_META["tier4_html_parsing"]
+
+
+def get_tier_meta(tier: str) -> TierMeta:
+    """Get metadata for a tier (accepts ScrapeTier members or their string values)"""
+    return TIER_META.get(tier, DEFAULT_TIER_META)
+
 
 # Overpass API Configuration
+@lru_cache(maxsize=1)
 def get_overpass_config() -> dict:
     """Get Overpass API configuration from environment variables or defaults"""
-    base_url = os.getenv("OVERPASS_API_URL", "https://overpass-api.de")
+    env = os.environ
+    base_url = env.get("OVERPASS_API_URL", "https://overpass-api.de")
     # Remove /api/interpreter if present (for backward compatibility)
     if base_url.endswith("/api/interpreter"):
         base_url = base_url[:-15]
     return {
         "url": base_url.rstrip("/"),
-        "cache_ttl": int(os.getenv("OVERPASS_CACHE_TTL", "300")),  # 5 minutes default
-        "rate_limit": int(os.getenv("OVERPASS_RATE_LIMIT", "60")),  # 60 queries per minute
-        "timeout": int(os.getenv("OVERPASS_TIMEOUT", "60"))  # 60 seconds default
+        "cache_ttl": int(env.get("OVERPASS_CACHE_TTL", "300")),  # 5 minutes default
+        "cache_max_entries": int(env.get("OVERPASS_CACHE_MAX", "512")),  # Bounds memory held by cached responses
+        "redis_url": env.get("REDIS_URL") or None,  # Share cache and rate limits across workers (needs redis)
+        "rate_limit": int(env.get("OVERPASS_RATE_LIMIT", "60")),  # 60 queries per minute
+        "timeout": int(env.get("OVERPASS_TIMEOUT", "60")),  # 60 seconds default
+        "facilities_cache_ttl": int(env.get("OVERPASS_FACILITIES_CACHE_TTL", "600")),  # Mapped /facilities payloads
+        # Connection pool for the single upstream host; idle connections are kept well
+        # past httpx's 5s default so polling clients reuse them instead of re-handshaking
+        "max_connections": int(env.get("OVERPASS_MAX_CONNECTIONS", "20")),
+        "max_keepalive_connections": int(env.get("OVERPASS_MAX_KEEPALIVE_CONNECTIONS", "10")),
+        "keepalive_expiry": float(env.get("OVERPASS_KEEPALIVE_EXPIRY", "75")),  # nginx keepalive_timeout default
+        "http2": env.get("OVERPASS_HTTP2", "1") == "1"  # Multiplex concurrent queries over TLS (needs httpx[http2])
+    }
+
+
+# Response cache for read-heavy API endpoints (see services/response_cache)
+@lru_cache(maxsize=1)
+def get_response_cache_config() -> dict:
+    """Get API response cache configuration from environment variables or defaults"""
+    env = os.environ
+    return {
+        "ttl": int(env.get("RESPONSE_CACHE_TTL", "300")),  # 5 minutes default
+        "max_entries": int(env.get("RESPONSE_CACHE_MAX", "1024")),
+        # Share invalidations across workers (needs redis); defaults to the Overpass REDIS_URL
+        "redis_url": env.get("RESPONSE_CACHE_REDIS_URL") or env.get("REDIS_URL") or None,
+        # Seconds a worker reuses a namespace's generation before re-reading it from Redis:
+        # the most another worker's invalidation can lag, in exchange for no round trip per hit
+        "generation_ttl": float(env.get("RESPONSE_CACHE_GENERATION_TTL", "1")),
+    }
+
+
+def reset_config_cache() -> None:
+    """
+    Clear cached configuration so the next call re-reads the environment
+
+    Intended for tests that patch environment variables. Note that the
+    module-level ``scraper_config`` instance is not rebuilt.
+    """
+    get_scraper_config.cache_clear()
+    get_overpass_config.cache_clear()
+    get_cors_config.cache_clear()
+    get_response_cache_config.cache_clear()
+
+
+# CORS Configuration
+# Origin regex used when CORS_ORIGINS is not set: allow any http:// origin
+# (e.g., 192.168.x.x for network access). Starlette compiles it once.
+CORS_ANY_HTTP_ORIGIN_REGEX = r"http://.*"
+
+
+@lru_cache(maxsize=1)
+def get_cors_config() -> dict:
+    """Get CORSMiddleware keyword arguments from CORS_ORIGINS or defaults"""
+    env_cors_origins = os.environ.get("CORS_ORIGINS")
+    if not env_cors_origins:
+        return {
+            "allow_origins": [],  # Empty list when using regex
+            "allow_origin_regex": CORS_ANY_HTTP_ORIGIN_REGEX,
+            "allow_credentials": False  # Must be False when using wildcard/regex
+        }
+    return {
+        "allow_origins": [origin.strip() for origin in env_cors_origins.split(",") if origin.strip()],
+        "allow_origin_regex": None,
+        "allow_credentials": True
     }
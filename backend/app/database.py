@@ -2,9 +2,11 @@
 Database configuration and session management
 """
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from urllib.parse import urlparse
+from functools import lru_cache
 import logging
 import os
 
@@ -30,24 +32,56 @@ DATABASE_URL = os.getenv(
 
 validate_database_url(DATABASE_URL)
 
-# Create SQLAlchemy engine
-try:
+# Connection pool settings (override via environment for high-concurrency deployments)
+# DB_MAX_OVERFLOW=-1 removes the overflow limit entirely
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # Seconds before a connection is replaced
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+
+# Compiled SQL cache entries per engine; SQLAlchemy's default (500) is small once
+# every filter/pagination combination of the hot endpoints has its own entry
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """
+    Get the SQLAlchemy engine, creating it on first use
+
+    No connection is opened here; pool_pre_ping verifies liveness on checkout,
+    so the app can start while the database is briefly unavailable.
+    """
     engine = create_engine(
         DATABASE_URL,
         pool_pre_ping=True,  # Verify connections before using
-        pool_size=10,
-        max_overflow=20
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,  # Retire connections before server/proxy idle timeouts
+        pool_timeout=DB_POOL_TIMEOUT,
+        query_cache_size=DB_QUERY_CACHE_SIZE,
+        executemany_mode="values_plus_batch"  # Batched UPDATE executemany (ETL upserts, backfills)
     )
-    # Test connection
-    with engine.connect() as conn:
-        conn.execute(text("SELECT 1"))
-    logger.info("Database connection established successfully")
-except Exception as e:
-    logger.error(f"Failed to connect to database: {e}")
-    raise
+    logger.info("Database engine created")
+    return engine
+
+
+POSTGIS_CHECK_SQL = text("SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'postgis')")
+
+
+@lru_cache(maxsize=1)
+def has_postgis() -> bool:
+    """
+    Whether the PostGIS extension is installed
+
+    Checked once per process; restart the app after enabling the extension.
+    """
+    with get_engine().connect() as conn:
+        return bool(conn.execute(POSTGIS_CHECK_SQL).scalar())
+
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create session factory (bound to the engine per session via get_engine())
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 # Base class for models
 Base = declarative_base()
@@ -58,7 +92,7 @@ def get_db():
     Dependency for getting database session
     Use with FastAPI Depends()
     """
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     except Exception as e:
@@ -2,46 +2,54 @@
 HealthPulse Registry Backend API
 FastAPI application for managing ETL jobs and health facility data
 """
+import logging
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.config import get_cors_config
+from app.database import get_engine, get_db, Base
 from app.routes import etl_jobs, overpass, facilities
+from app.services.overpass_proxy import close_overpass_service, get_overpass_service
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks"""
+    # Tables are normally created by init_db.py; opt in to creating them on boot
+    if os.getenv("AUTO_CREATE_TABLES") == "1":
+        Base.metadata.create_all(bind=get_engine())
+    # One Overpass client (and connection pool) for the app's lifetime, so upstream
+    # connections are kept alive across requests and closed cleanly on shutdown
+    app.state.overpass = get_overpass_service()
+    yield
+    await close_overpass_service()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="HealthPulse Registry API",
     description="Backend API for health facility registry and ETL pipeline management",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 
 
 # CORS middleware - allow frontend to access API
 # If CORS_ORIGINS is not explicitly set, allow all HTTP origins for network access (e.g., 192.168.x.x)
-# Use regex pattern to match any http:// origin
-env_cors_origins = os.getenv("CORS_ORIGINS")
-default_origins = "http://localhost:5173,http://localhost:3000,http://localhost:3001,http://127.0.0.1:5173,http://127.0.0.1:3001,http://localhost:8002,http://127.0.0.1:8002"
-if not env_cors_origins:
-    cors_origins = []  # Empty list when using regex
-    cors_regex = r"http://.*"  # Allow any http origin
-    allow_creds = False  # Must be False when using wildcard/regex
-else:
-    cors_origins = env_cors_origins.split(",")
-    cors_regex = None
-    allow_creds = True
-
 app.add_middleware(
     CORSMiddleware,
-    allow_origin_regex=cors_regex,
-    allow_origins=cors_origins,
-    allow_credentials=allow_creds,
     allow_methods=["*"],
     allow_headers=["*"],
+    **get_cors_config()
 )
 
 # Include routers
@@ -65,3 +73,14 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+@app.get("/health/db")
+def database_health_check(db: Session = Depends(get_db)):
+    """Database liveness check (runs SELECT 1 on demand); 503 when the database is unreachable"""
+    try:
+        db.execute(text("SELECT 1"))
+        return {"status": "healthy", "database": "connected"}
+    except Exception as e:
+        # Details stay in the server log: driver errors can include the host or DSN
+        logger.error(f"Database health check failed: {e}")
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "database": "unavailable"})
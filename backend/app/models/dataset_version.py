@@ -2,7 +2,7 @@
 Dataset Version tracking model
 Tracks file versions, hashes, and schema fingerprints to prevent duplicate scraping
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Index
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, func, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -15,7 +15,7 @@ class DatasetVersion(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     dataset_id = Column(String(255), ForeignKey("dosm_datasets.dataset_id"), nullable=False, index=True)
-    file_hash = Column(String(64), nullable=False, index=True)  # SHA-256 hash
+    file_hash = Column(LargeBinary(32), nullable=False, index=True)  # Raw SHA-256 digest (bytea)
     schema_fingerprint = Column(String(255), nullable=True)  # JSON schema fingerprint
     version_number = Column(Integer, nullable=False, default=1)
     record_count = Column(Integer, nullable=False, default=0)
@@ -31,6 +31,11 @@ class DatasetVersion(Base):
         Index('idx_dataset_hash', 'dataset_id', 'file_hash'),
     )
 
+    @property
+    def file_hash_hex(self) -> str:
+        """Hex-encoded file hash for logging and API responses"""
+        return self.file_hash.hex() if self.file_hash else ""
+
     def __repr__(self):
-        return f"<DatasetVersion(id={self.id}, dataset_id={self.dataset_id}, version={self.version_number}, hash={self.file_hash[:8]}...)>"
+        return f"<DatasetVersion(id={self.id}, dataset_id={self.dataset_id}, version={self.version_number}, hash={self.file_hash_hex[:8]}...)>"
 
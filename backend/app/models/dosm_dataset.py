@@ -2,7 +2,7 @@
 DOSM Dataset database model
 Tracks discovered datasets and their scraping configuration
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, func
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, Index, func, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -43,6 +43,11 @@ class DOSMDataset(Base):
     versions = relationship("DatasetVersion", back_populates="dataset", cascade="all, delete-orphan")
     records = relationship("DOSMRecord", back_populates="dataset", cascade="all, delete-orphan")
 
+    # Listing filters on is_active and orders by created_at DESC
+    __table_args__ = (
+        Index('idx_active_created', 'created_at', postgresql_where=text('is_active = true')),
+    )
+
     def __repr__(self):
         return f"<DOSMDataset(id={self.id}, dataset_id={self.dataset_id}, tier={self.tier})>"
 
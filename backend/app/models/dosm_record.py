@@ -2,7 +2,8 @@
 DOSM Record database model
 Stores scraped records with mandatory metadata block
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, func, Index
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -16,11 +17,11 @@ class DOSMRecord(Base):
     id = Column(Integer, primary_key=True, index=True)
     dataset_id = Column(String(255), ForeignKey("dosm_datasets.dataset_id"), nullable=False, index=True)
     
-    # Data fields stored as JSON (flexible schema)
-    data = Column(JSON, nullable=False)
+    # Data fields stored as JSONB (flexible schema)
+    data = Column(JSONB, nullable=False)
     
     # Mandatory metadata block
-    record_metadata = Column(JSON, nullable=False)
+    record_metadata = Column(JSONB, nullable=False)
     # record_metadata structure:
     # {
     #   "source": "DOSM",
@@ -41,6 +42,8 @@ class DOSMRecord(Base):
     # Index for efficient queries
     __table_args__ = (
         Index('idx_dataset_created', 'dataset_id', 'created_at'),
+        Index('idx_records_meta_gin', 'record_metadata', postgresql_using='gin',
+              postgresql_ops={'record_metadata': 'jsonb_path_ops'}),
     )
 
     def __repr__(self):
@@ -1,7 +1,7 @@
 """
 ETL Job database model
 """
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
 from app.database import Base
 
 
@@ -20,6 +20,12 @@ class ETLJob(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    # Job listing orders by created_at DESC; source is included so recent-activity
+    # counts (distinct sources since a cutoff) are answered from the index alone
+    __table_args__ = (
+        Index('idx_etljobs_created_source', created_at.desc(), source),
+    )
+
     def __repr__(self):
         return f"<ETLJob(id={self.id}, source={self.source}, status={self.status})>"
 
@@ -2,9 +2,9 @@
 Facility database model
 Stores healthcare facilities fetched from Overpass API via ETL
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, func, Index
-from sqlalchemy.dialects.postgresql import JSON
-from app.database import Base
+from sqlalchemy import Column, Integer, String, Float, DateTime, DDL, event, func, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from app.database import Base, POSTGIS_CHECK_SQL
 
 
 class Facility(Base):
@@ -22,8 +22,9 @@ class Facility(Base):
     longitude = Column(Float, nullable=False, index=True)
     address = Column(String(500))
     contact = Column(String(100))
+    state = Column(String(64))  # Malaysian state resolved during ETL (see state_mapping.resolve_facility_state)
     quality_score = Column(Integer, default=0)
-    osm_tags = Column(JSON)  # Store full OSM tags as JSON
+    osm_tags = Column(JSONB)  # Store full OSM tags as JSONB
     last_updated_osm = Column(DateTime(timezone=True))  # Last update time from OSM
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -33,8 +34,36 @@ class Facility(Base):
         Index('idx_location', 'latitude', 'longitude'),
         Index('idx_type_location', 'facility_type', 'latitude', 'longitude'),
         Index('idx_name_search', 'name'),  # For text search
+        Index('idx_type_name', 'facility_type', 'name'),  # Type filter ordered by name
+        Index('facilities_state_idx', 'state'),  # Counts by state
+        Index('idx_facility_updated_at', 'updated_at'),  # Latest change for the data version (ETags)
+        Index('idx_osm_tags_gin', 'osm_tags', postgresql_using='gin',
+              postgresql_ops={'osm_tags': 'jsonb_path_ops'}),  # Tag containment (@>) queries
     )
 
     def __repr__(self):
         return f"<Facility(id={self.id}, osm_id={self.osm_id}, name={self.name}, type={self.facility_type})>"
 
+
+
+# Facility location as a PostGIS point; must match the GiST index expression below
+# so bbox filters (FACILITY_POINT && ST_MakeEnvelope(...)) can use the index
+FACILITY_POINT = func.ST_SetSRID(func.ST_MakePoint(Facility.longitude, Facility.latitude), 4326)
+
+# Spatial index over FACILITY_POINT (also applied to existing databases by scripts/upgrade_schema.py)
+FACILITY_POINT_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_facility_point_gist ON facilities "
+    "USING GIST (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326))"
+)
+
+
+def _postgis_installed(ddl, target, bind, **kw) -> bool:
+    """Only emit the spatial index when PostGIS is available (idx_location covers the rest)"""
+    return bool(bind.execute(POSTGIS_CHECK_SQL).scalar())
+
+
+event.listen(
+    Facility.__table__,
+    "after_create",
+    DDL(FACILITY_POINT_INDEX_SQL).execute_if(callable_=_postgis_installed)
+)
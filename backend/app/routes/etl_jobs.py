@@ -1,12 +1,17 @@
 """
 ETL Jobs API routes
 """
+import asyncio
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+import threading
+from cachetools import LRUCache
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from pydantic import TypeAdapter
+from sqlalchemy import distinct, func, insert, select, update
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
-from app.database import get_db
+from app.database import SessionLocal, get_db, get_engine
 from app.models.etl_job import ETLJob
 from app.models.dosm_dataset import DOSMDataset
 from app.models.dataset_version import DatasetVersion
@@ -17,26 +22,63 @@ from app.schemas.scraper_config import DatasetDiscoveryRequest, ScrapeRequest
 from app.services.dosm_scraper import DOSMScraper
 from app.services.dataset_discovery import DatasetDiscovery
 from app.services.source_gate import SourceGateError
+from app.services.bbox import parse_bbox
 from app.services.facility_etl import run_facility_etl_job
+from app.services.response_cache import cache_response, response_cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Response cache namespaces (invalidated by write endpoints)
+ETL_JOBS_CACHE = "etl-jobs"
+DOSM_CACHE = "dosm"
+
+# List endpoints fetch through a server-side cursor, hydrating this many ORM rows at a time
+LIST_YIELD_PER = 100
+
+# List responses are validated in a single pydantic-core pass instead of per row
+_ETL_JOBS_ADAPTER = TypeAdapter(List[ETLJobResponse])
+_DATASETS_ADAPTER = TypeAdapter(List[DOSMDatasetResponse])
+_VERSIONS_ADAPTER = TypeAdapter(List[DatasetVersionResponse])
+
+# Dataset listings select just the response's columns: rows are validated straight from
+# their mappings in pydantic-core, without materializing (and tracking) ORM instances
+_DATASET_RESPONSE_COLUMNS = tuple(DOSMDataset.__table__.c[name] for name in DOSMDatasetResponse.model_fields)
+
+# Validated dataset responses keyed by (id, updated_at): any write to the row bumps
+# updated_at, so a changed dataset simply misses and is re-validated
+_dataset_responses: LRUCache = LRUCache(maxsize=4096)
+_dataset_responses_lock = threading.Lock()
+
+# Handlers doing blocking Session/scraper I/O are plain `def` so FastAPI runs
+# them in its threadpool instead of stalling the event loop
+
 
 def map_to_response(job: ETLJob) -> ETLJobResponse:
-    """Map database model to response schema"""
-    return ETLJobResponse(
-        id=str(job.id),
-        source=job.source,
-        status=job.status,
-        records_processed=job.records_processed,
-        start_time=job.start_time.isoformat() if job.start_time else "",
-        errors=job.errors
-    )
+    """Map database model to response schema (timestamps are serialized once, on output)"""
+    return ETLJobResponse.model_validate(job)
+
+
+def dataset_to_response(dataset: DOSMDataset) -> DOSMDatasetResponse:
+    """Map a dataset row to its response schema, reusing the validated model while the row is unchanged"""
+    key = (dataset.id, dataset.updated_at)
+    with _dataset_responses_lock:
+        response = _dataset_responses.get(key)
+    if response is None:
+        response = DOSMDatasetResponse.model_validate(dataset)
+        with _dataset_responses_lock:
+            _dataset_responses[key] = response
+    return response
+
+
+def insert_etl_job(db: Session, **values) -> ETLJob:
+    """Insert an ETL job and get the stored row back in one round trip (INSERT ... RETURNING)"""
+    return db.execute(insert(ETLJob).values(**values).returning(ETLJob)).scalar_one()
 
 
 @router.get("/etl-jobs/", response_model=List[ETLJobResponse])
-async def get_etl_jobs(
+@cache_response(ETL_JOBS_CACHE)
+def get_etl_jobs(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
@@ -53,29 +95,34 @@ async def get_etl_jobs(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="limit must be between 1 and 1000")
 
     try:
-        jobs = db.query(ETLJob).order_by(ETLJob.created_at.desc()).offset(skip).limit(limit).all()
-        logger.info(f"Retrieved {len(jobs)} ETL jobs with skip={skip}, limit={limit}")
-        return [map_to_response(job) for job in jobs]
+        jobs = db.execute(
+            select(ETLJob).order_by(ETLJob.created_at.desc()).offset(skip).limit(limit)
+            .execution_options(yield_per=LIST_YIELD_PER)
+        ).scalars()
+        responses = _ETL_JOBS_ADAPTER.validate_python(jobs, from_attributes=True)
+        logger.info(f"Retrieved {len(responses)} ETL jobs with skip={skip}, limit={limit}")
+        return responses
     except Exception as e:
         logger.error(f"Error retrieving ETL jobs: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
 
 @router.get("/etl-jobs/metrics")
-async def get_etl_metrics(db: Session = Depends(get_db)):
+def get_etl_metrics(db: Session = Depends(get_db)):
     """
     Get ETL pipeline metrics for dashboard display
     """
     try:
-        # Get all jobs
-        all_jobs = db.query(ETLJob).all()
+        # Status is compared in SQL against the enum value, not per row in Python
+        is_completed = ETLJob.status == ETLJobStatus.COMPLETED.value
         
-        # Calculate metrics based on recent jobs
-        completed_jobs = [job for job in all_jobs if job.status == ETLJobStatus.COMPLETED]
-        recent_jobs = completed_jobs[-10:] if completed_jobs else []
+        # Calculate metrics based on the 10 most recent completed jobs
+        recent_jobs = db.query(ETLJob.records_processed, ETLJob.errors).filter(
+            is_completed
+        ).order_by(ETLJob.created_at.desc()).limit(10).all()
         
         # Sources active: Count unique sources from completed jobs
-        active_sources = len(set([job.source for job in completed_jobs])) if completed_jobs else 0
+        active_sources = db.query(func.count(distinct(ETLJob.source))).filter(is_completed).scalar() or 0
         total_sources = 12  # Could be dynamic based on configured sources
         
         # Average confidence score: Calculate based on success rate of recent jobs
@@ -110,7 +157,7 @@ async def get_etl_metrics(db: Session = Depends(get_db)):
 
 
 @router.get("/etl-jobs/{job_id}", response_model=ETLJobResponse)
-async def get_etl_job(job_id: int, db: Session = Depends(get_db)):
+def get_etl_job(job_id: int, db: Session = Depends(get_db)):
     """
     Get a specific ETL job by ID
     """
@@ -131,7 +178,7 @@ async def get_etl_job(job_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/etl-jobs/", response_model=ETLJobResponse, status_code=status.HTTP_201_CREATED)
-async def create_etl_job(
+def create_etl_job(
     job_data: ETLJobCreate,
     db: Session = Depends(get_db)
 ):
@@ -141,20 +188,21 @@ async def create_etl_job(
     Creates a new ETL job with the specified source and status
     """
     # Create new ETL job
-    db_job = ETLJob(
+    db_job = insert_etl_job(
+        db,
         source=job_data.source,
         status=job_data.status or "Pending"
     )
-    
-    db.add(db_job)
+    # Build the response before commit expires the instance (avoids a refresh SELECT)
+    response = map_to_response(db_job)
     db.commit()
-    db.refresh(db_job)
+    response_cache.invalidate(ETL_JOBS_CACHE)
     
-    return map_to_response(db_job)
+    return response
 
 
 @router.patch("/etl-jobs/{job_id}", response_model=ETLJobResponse)
-async def update_etl_job(
+def update_etl_job(
     job_id: int,
     job_data: dict,
     db: Session = Depends(get_db)
@@ -164,29 +212,33 @@ async def update_etl_job(
     
     Updates job status, records_processed, or errors
     """
-    job = db.query(ETLJob).filter(ETLJob.id == job_id).first()
+    # Update allowed fields in a single UPDATE ... RETURNING statement
+    changes = {
+        field: job_data[field]
+        for field in ("status", "records_processed", "errors")
+        if field in job_data
+    }
+    if changes:
+        job = db.execute(
+            update(ETLJob).where(ETLJob.id == job_id).values(**changes).returning(ETLJob)
+        ).scalar_one_or_none()
+    else:
+        job = db.query(ETLJob).filter(ETLJob.id == job_id).first()
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"ETL job with ID {job_id} not found"
         )
     
-    # Update allowed fields
-    if "status" in job_data:
-        job.status = job_data["status"]
-    if "records_processed" in job_data:
-        job.records_processed = job_data["records_processed"]
-    if "errors" in job_data:
-        job.errors = job_data["errors"]
-    
+    response = map_to_response(job)
     db.commit()
-    db.refresh(job)
+    response_cache.invalidate(ETL_JOBS_CACHE)
     
-    return map_to_response(job)
+    return response
 
 
 @router.delete("/etl-jobs/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_etl_job(job_id: int, db: Session = Depends(get_db)):
+def delete_etl_job(job_id: int, db: Session = Depends(get_db)):
     """
     Delete an ETL job
     """
@@ -199,6 +251,7 @@ async def delete_etl_job(job_id: int, db: Session = Depends(get_db)):
     
     db.delete(job)
     db.commit()
+    response_cache.invalidate(ETL_JOBS_CACHE)
     
     return None
 
@@ -206,7 +259,7 @@ async def delete_etl_job(job_id: int, db: Session = Depends(get_db)):
 # ==================== DOSM Scraping Endpoints ====================
 
 @router.post("/etl-jobs/dosm/discover", response_model=List[DOSMDatasetResponse])
-async def discover_dosm_datasets(
+def discover_dosm_datasets(
     request: DatasetDiscoveryRequest,
     db: Session = Depends(get_db)
 ):
@@ -221,10 +274,12 @@ async def discover_dosm_datasets(
         datasets = discovery.discover_and_register(
             category=request.category,
             limit=request.limit,
-            auto_assign_tiers=request.auto_assign_tiers
+            auto_assign_tiers=request.auto_assign_tiers,
+            use_cache=not request.force
         )
+        response_cache.invalidate(DOSM_CACHE)
         
-        return [DOSMDatasetResponse.model_validate(ds) for ds in datasets]
+        return [dataset_to_response(ds) for ds in datasets]
         
     except Exception as e:
         logger.error(f"Error discovering DOSM datasets: {e}")
@@ -235,7 +290,8 @@ async def discover_dosm_datasets(
 
 
 @router.get("/etl-jobs/dosm/datasets", response_model=List[DOSMDatasetResponse])
-async def list_dosm_datasets(
+@cache_response(DOSM_CACHE)
+def list_dosm_datasets(
     skip: int = 0,
     limit: int = 100,
     is_active: bool = True,
@@ -245,12 +301,15 @@ async def list_dosm_datasets(
     List all discovered DOSM datasets
     """
     try:
-        query = db.query(DOSMDataset)
+        query = select(*_DATASET_RESPONSE_COLUMNS)
         if is_active is not None:
-            query = query.filter(DOSMDataset.is_active == is_active)
+            query = query.where(DOSMDataset.is_active == is_active)
         
-        datasets = query.order_by(DOSMDataset.created_at.desc()).offset(skip).limit(limit).all()
-        return [DOSMDatasetResponse.model_validate(ds) for ds in datasets]
+        rows = db.execute(
+            query.order_by(DOSMDataset.created_at.desc()).offset(skip).limit(limit)
+            .execution_options(yield_per=LIST_YIELD_PER)
+        ).mappings()
+        return _DATASETS_ADAPTER.validate_python(rows)
         
     except Exception as e:
         logger.error(f"Error listing DOSM datasets: {e}")
@@ -261,7 +320,8 @@ async def list_dosm_datasets(
 
 
 @router.get("/etl-jobs/dosm/datasets/{dataset_id}", response_model=DOSMDatasetResponse)
-async def get_dosm_dataset(
+@cache_response(DOSM_CACHE)
+def get_dosm_dataset(
     dataset_id: str,
     db: Session = Depends(get_db)
 ):
@@ -274,11 +334,11 @@ async def get_dosm_dataset(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Dataset {dataset_id} not found"
         )
-    return DOSMDatasetResponse.model_validate(dataset)
+    return dataset_to_response(dataset)
 
 
 @router.post("/etl-jobs/dosm/scrape/{dataset_id}")
-async def trigger_dosm_scrape(
+def trigger_dosm_scrape(
     dataset_id: str,
     request: ScrapeRequest,
     db: Session = Depends(get_db)
@@ -288,14 +348,30 @@ async def trigger_dosm_scrape(
     
     Creates an ETL job record and runs the scraper.
     """
+    # Reject unknown/inactive datasets before writing a job record
+    is_active = db.query(DOSMDataset.is_active).filter(
+        DOSMDataset.dataset_id == dataset_id
+    ).scalar()
+    if is_active is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Dataset {dataset_id} not found. Run discovery first."
+        )
+    if not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Dataset {dataset_id} is not active"
+        )
+    
     # Create ETL job record
-    etl_job = ETLJob(
+    etl_job = insert_etl_job(
+        db,
         source=f"DOSM_{dataset_id}",
         status=ETLJobStatus.RUNNING
     )
-    db.add(etl_job)
+    etl_job_id = etl_job.id
     db.commit()
-    db.refresh(etl_job)
+    response_cache.invalidate(ETL_JOBS_CACHE)
     
     try:
         # Initialize scraper
@@ -315,7 +391,7 @@ async def trigger_dosm_scrape(
         db.commit()
         
         return {
-            "etl_job_id": etl_job.id,
+            "etl_job_id": etl_job_id,
             "dataset_id": dataset_id,
             "result": result
         }
@@ -345,10 +421,14 @@ async def trigger_dosm_scrape(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error scraping dataset: {str(e)}"
         )
+    finally:
+        response_cache.invalidate(ETL_JOBS_CACHE)
+        response_cache.invalidate(DOSM_CACHE)
 
 
 @router.get("/etl-jobs/dosm/versions/{dataset_id}", response_model=List[DatasetVersionResponse])
-async def get_dataset_versions(
+@cache_response(DOSM_CACHE)
+def get_dataset_versions(
     dataset_id: str,
     limit: int = 10,
     db: Session = Depends(get_db)
@@ -356,25 +436,80 @@ async def get_dataset_versions(
     """
     Get version history for a dataset
     """
-    # Verify dataset exists
-    dataset = db.query(DOSMDataset).filter(DOSMDataset.dataset_id == dataset_id).first()
-    if not dataset:
+    # Single round trip: the outer join doubles as the dataset existence check
+    # (a dataset without versions yields one row with version=None)
+    rows = db.query(DOSMDataset.id, DatasetVersion).outerjoin(
+        DatasetVersion, DatasetVersion.dataset_id == DOSMDataset.dataset_id
+    ).filter(
+        DOSMDataset.dataset_id == dataset_id
+    ).order_by(DatasetVersion.version_number.desc()).limit(limit).all()
+    
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Dataset {dataset_id} not found"
         )
     
-    versions = db.query(DatasetVersion).filter(
-        DatasetVersion.dataset_id == dataset_id
-    ).order_by(DatasetVersion.version_number.desc()).limit(limit).all()
+    versions = (version for _, version in rows if version is not None)
     
-    return [DatasetVersionResponse.model_validate(v) for v in versions]
+    return _VERSIONS_ADAPTER.validate_python(versions, from_attributes=True)
 
 
 # ==================== Overpass Facilities ETL Endpoints ====================
 
-@router.post("/etl-jobs/overpass-facilities")
-async def trigger_facility_etl(
+def _record_etl_job_outcome(db: Session, etl_job_id: int, rollback: bool = False, **values) -> None:
+    """Update an ETL job row and commit (blocking; background tasks run it in a thread)"""
+    if rollback:
+        db.rollback()
+    db.execute(update(ETLJob).where(ETLJob.id == etl_job_id).values(**values))
+    db.commit()
+
+
+async def _run_facility_etl_task(etl_job_id: int, bbox: Optional[List[float]]) -> None:
+    """
+    Background worker for the facility ETL job
+    
+    Uses its own session so the request-scoped one is released as soon as the
+    202 response is sent, and records the outcome on the ETL job row. The task is
+    async to consume the Overpass stream; its blocking Session work runs in
+    worker threads so it doesn't stall the event loop.
+    """
+    db = SessionLocal(bind=get_engine())
+    try:
+        logger.info(f"Starting facility ETL job {etl_job_id} (bbox: {bbox})")
+        
+        result = await run_facility_etl_job(
+            db=db,
+            bbox=bbox,
+            client_id=f"etl_job_{etl_job_id}"
+        )
+        
+        await asyncio.to_thread(
+            _record_etl_job_outcome, db, etl_job_id,
+            status=ETLJobStatus.COMPLETED,
+            records_processed=result.get("stored", 0) + result.get("updated", 0),
+            errors=result.get("errors", 0)
+        )
+        
+        logger.info(
+            f"Facility ETL job {etl_job_id} completed successfully: "
+            f"{result['stored']} new and {result['updated']} updated facilities"
+        )
+    except Exception as e:
+        await asyncio.to_thread(
+            _record_etl_job_outcome, db, etl_job_id, rollback=True,
+            status=ETLJobStatus.FAILED,
+            errors=1
+        )
+        logger.error(f"Facility ETL job {etl_job_id} failed: {e}")
+    finally:
+        await asyncio.to_thread(db.close)
+        await asyncio.to_thread(response_cache.invalidate, ETL_JOBS_CACHE)
+
+
+@router.post("/etl-jobs/overpass-facilities", status_code=status.HTTP_202_ACCEPTED)
+def trigger_facility_etl(
+    background_tasks: BackgroundTasks,
     bbox: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
@@ -383,23 +518,20 @@ async def trigger_facility_etl(
     
     This endpoint:
     1. Creates an ETL job record
-    2. Fetches facilities from Overpass API (may take 10-30 seconds)
-    3. Stores/updates facilities in the database
-    4. Returns job status and statistics
+    2. Schedules the fetch from Overpass API (may take 10-30 seconds) in the background
+    3. Returns 202 Accepted with the ETL job ID immediately
+    
+    The background task stores/updates facilities and marks the job Completed or
+    Failed; poll GET /etl-jobs/{etl_job_id} for the outcome.
     
     Query parameters:
     - bbox: Optional bounding box as "south,west,north,east". Defaults to Malaysia bounds.
-    
-    Note: This is a long-running operation. The Overpass API query can take 10-30+ seconds.
     """
     # Parse bounding box if provided
     parsed_bbox = None
     if bbox:
         try:
-            coords = [float(x.strip()) for x in bbox.split(",")]
-            if len(coords) != 4:
-                raise ValueError("Bounding box must have 4 coordinates")
-            parsed_bbox = coords
+            parsed_bbox = list(parse_bbox(bbox))
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -407,48 +539,19 @@ async def trigger_facility_etl(
             )
     
     # Create ETL job record
-    etl_job = ETLJob(
+    etl_job = insert_etl_job(
+        db,
         source="Overpass_API_Facilities",
         status=ETLJobStatus.RUNNING
     )
-    db.add(etl_job)
+    etl_job_id = etl_job.id
     db.commit()
-    db.refresh(etl_job)
+    response_cache.invalidate(ETL_JOBS_CACHE)
     
-    try:
-        logger.info(f"Starting facility ETL job {etl_job.id} (bbox: {parsed_bbox})")
-        
-        # Run ETL job
-        result = await run_facility_etl_job(
-            db=db,
-            bbox=parsed_bbox,
-            client_id=f"etl_job_{etl_job.id}"
-        )
-        
-        # Update ETL job with results
-        etl_job.status = ETLJobStatus.COMPLETED
-        etl_job.records_processed = result.get("stored", 0) + result.get("updated", 0)
-        etl_job.errors = result.get("errors", 0)
-        db.commit()
-        
-        logger.info(f"Facility ETL job {etl_job.id} completed successfully")
-        
-        return {
-            "etl_job_id": etl_job.id,
-            "status": "completed",
-            "result": result,
-            "message": f"Successfully processed {result['stored']} new and {result['updated']} updated facilities"
-        }
-        
-    except Exception as e:
-        # Update ETL job with error
-        etl_job.status = ETLJobStatus.FAILED
-        etl_job.errors = 1
-        db.commit()
-        
-        logger.error(f"Facility ETL job {etl_job.id} failed: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"ETL job failed: {str(e)}"
-        )
-
+    background_tasks.add_task(_run_facility_etl_task, etl_job_id, parsed_bbox)
+    
+    return {
+        "etl_job_id": etl_job_id,
+        "status": "running",
+        "message": f"Facility ETL job {etl_job_id} started"
+    }
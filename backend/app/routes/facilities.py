@@ -3,23 +3,123 @@ Facilities API routes
 Query facilities from database (fast) instead of Overpass API (slow)
 """
 import logging
-from typing import Optional, List
-from datetime import datetime, timedelta
-from fastapi import APIRouter, Query, HTTPException, Depends
+from itertools import chain
+from typing import Iterator, Optional, List
+from datetime import timedelta
+import orjson
+from fastapi import APIRouter, Query, HTTPException, Depends, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, text
-from app.database import get_db
-from app.models.facility import Facility
+from sqlalchemy import RowMapping, Select, Text, and_, cast, distinct, func, select, text
+from app.database import SessionLocal, get_db, get_engine, has_postgis
+from app.models.facility import FACILITY_POINT, Facility
 from app.models.etl_job import ETLJob
-from app.services.state_mapping import get_comprehensive_city_state_mapping, normalize_state_name, get_state_from_coordinates
+from app.routes.etl_jobs import ETL_JOBS_CACHE
+from app.services.bbox import parse_bbox
+from app.services.response_cache import response_cache
+from app.services.http_cache import (
+    cache_headers,
+    get_facility_data_version,
+    make_etag,
+    not_modified_response,
+    not_modified_since,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Handlers use the blocking Session, so they are plain `def` and FastAPI runs them
+# in its threadpool instead of stalling the event loop
 
-@router.get("/facilities")
-async def get_facilities(
+# Response cache namespaces; keys also carry the facility data version (see http_cache)
+FACILITY_STATS_CACHE = "facility-stats"
+FACILITIES_BY_STATE_CACHE = "facilities-by-state"
+
+# Rows fetched per server-side cursor round trip when streaming /facilities
+STREAM_BATCH_SIZE = 500
+
+# Columns needed for the facility payload (osm_tags aside); selected as plain row
+# mappings so queries skip ORM object hydration and the identity map
+FACILITY_LIST_COLUMNS = (
+    Facility.id,
+    Facility.osm_id,
+    Facility.name,
+    Facility.facility_type,
+    Facility.latitude,
+    Facility.longitude,
+    Facility.address,
+    Facility.contact,
+    Facility.last_updated_osm,
+    Facility.quality_score,
+)
+
+# OSM tags as JSON text: streamed responses splice it in verbatim instead of having
+# the driver parse every JSONB blob only for orjson to re-encode it
+OSM_TAGS_JSON = cast(Facility.osm_tags, Text).label("osm_tags")
+
+def _facility_to_dict(f: RowMapping) -> dict:
+    """Map a facility row mapping (FACILITY_LIST_COLUMNS) to the API response format, minus osm_tags"""
+    last_updated = f["last_updated_osm"]
+    return {
+        "id": f["id"],
+        "osm_id": f["osm_id"],
+        "name": f["name"],
+        "type": f["facility_type"],
+        "location": {"lat": f["latitude"], "lng": f["longitude"]},
+        "address": f["address"] or "",
+        "contact": f["contact"] or "",
+        "lastUpdated": last_updated.isoformat() if last_updated else "",
+        "score": f["quality_score"]
+    }
+
+
+def _encode_facility(row: RowMapping) -> bytes:
+    """orjson-encode a streamed facility row, appending its osm_tags JSON text as the last key"""
+    osm_tags = row["osm_tags"]
+    return b"%s,\"osm_tags\":%s}" % (
+        orjson.dumps(_facility_to_dict(row))[:-1],
+        osm_tags.encode() if osm_tags is not None else b"null"
+    )
+
+
+def _stream_facilities(page_stmt: Select, count_stmt: Select, skip: int, limit: int) -> Iterator[bytes]:
+    """
+    Yield the /facilities JSON payload in chunks, reading rows from a server-side cursor
+
+    Uses its own session: request-scoped dependencies are torn down before a
+    streaming body is sent. Nothing is yielded until the query has run and its first
+    rows (or the total, for an empty page) are read, so get_facilities primes the
+    generator to turn database errors into a 500 before any headers are sent.
+    """
+    db = SessionLocal(bind=get_engine())
+    try:
+        # Plain mappings: key lookups instead of per-attribute Row access
+        result = db.execute(page_stmt.execution_options(yield_per=STREAM_BATCH_SIZE)).mappings()
+        count = 0
+        total_count = None
+        for batch in result.partitions():
+            if total_count is None:
+                # Every row carries the pre-pagination total from COUNT(*) OVER ()
+                total_count = batch[0]["total"]
+            chunk = b",".join(_encode_facility(row) for row in batch)
+            yield (b"," + chunk) if count else (b'{"facilities":[' + chunk)
+            count += len(batch)
+        if total_count is None:
+            # Page past the end: no row to read the window total from
+            total_count = db.execute(count_stmt).scalar() if skip else 0
+            yield b'{"facilities":['
+        yield b'],"count":%d,"total":%d,"skip":%d,"limit":%d}' % (count, total_count, skip, limit)
+    except Exception as e:
+        logger.error(f"Error streaming facilities from database: {e}")
+        raise
+    finally:
+        db.close()
+
+
+@router.get("/facilities", response_class=ORJSONResponse)
+def get_facilities(
+    request: Request,
     bbox: Optional[str] = Query(None, description="Bounding box: south,west,north,east"),
     facility_type: Optional[str] = Query(None, description="Filter by type: 'hospital' or 'clinic'"),
     limit: int = Query(1000, le=10000, description="Maximum number of facilities to return"),
@@ -36,7 +136,7 @@ async def get_facilities(
     Use the /etl-jobs/overpass-facilities endpoint to refresh data.
     """
     try:
-        query = db.query(Facility)
+        filters = []
         
         # Filter by facility type
         if facility_type:
@@ -46,67 +146,56 @@ async def get_facilities(
                     status_code=400,
                     detail="facility_type must be 'hospital' or 'clinic'"
                 )
-            query = query.filter(Facility.facility_type == facility_type_lower)
+            filters.append(Facility.facility_type == facility_type_lower)
         
         # Filter by bounding box
         if bbox:
             try:
-                coords = [float(x.strip()) for x in bbox.split(",")]
-                if len(coords) != 4:
-                    raise ValueError("Bounding box must have 4 coordinates")
-                south, west, north, east = coords
+                south, west, north, east = parse_bbox(bbox)
                 
-                # Validate coordinates
-                if not (-90 <= south <= 90) or not (-90 <= north <= 90):
-                    raise ValueError("Latitude must be between -90 and 90")
-                if not (-180 <= west <= 180) or not (-180 <= east <= 180):
-                    raise ValueError("Longitude must be between -180 and 180")
-                if south >= north:
-                    raise ValueError("South must be less than north")
-                if west >= east:
-                    raise ValueError("West must be less than east")
-                
-                query = query.filter(
-                    and_(
-                        Facility.latitude >= south,
-                        Facility.latitude <= north,
-                        Facility.longitude >= west,
-                        Facility.longitude <= east
+                if has_postgis():
+                    # Bounding-box overlap on the GiST-indexed point expression
+                    filters.append(
+                        FACILITY_POINT.op("&&")(func.ST_MakeEnvelope(west, south, east, north, 4326))
+                    )
+                else:
+                    filters.append(
+                        and_(
+                            Facility.latitude >= south,
+                            Facility.latitude <= north,
+                            Facility.longitude >= west,
+                            Facility.longitude <= east
+                        )
                     )
-                )
             except ValueError as e:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Invalid bounding box format: {str(e)}. Expected: south,west,north,east"
                 )
         
-        # Get total count before pagination
-        total_count = query.count()
+        # Checked after validation, so invalid parameters never get a 304
+        etag = make_etag("facilities", get_facility_data_version(db))
+        not_modified = not_modified_response(request, etag)
+        if not_modified:
+            return not_modified
         
-        # Apply pagination
-        facilities = query.order_by(Facility.name).offset(skip).limit(limit).all()
+        # Apply pagination; the window COUNT(*) OVER () carries the pre-pagination total
+        # on every row, so the count and the page come back in one query
+        page_stmt = select(*FACILITY_LIST_COLUMNS, OSM_TAGS_JSON, func.count().over().label("total")).where(
+            *filters
+        ).order_by(Facility.name).offset(skip).limit(limit)
+        count_stmt = select(func.count(Facility.id)).where(*filters)
         
-        # Map to response format
-        facilities_data = [{
-            "id": f.id,
-            "osm_id": f.osm_id,
-            "name": f.name,
-            "type": f.facility_type,
-            "location": {"lat": f.latitude, "lng": f.longitude},
-            "address": f.address or "",
-            "contact": f.contact or "",
-            "lastUpdated": f.last_updated_osm.isoformat() if f.last_updated_osm else "",
-            "score": f.quality_score,
-            "osm_tags": f.osm_tags
-        } for f in facilities]
-        
-        return {
-            "facilities": facilities_data,
-            "count": len(facilities_data),
-            "total": total_count,
-            "skip": skip,
-            "limit": limit
-        }
+        # Rows are encoded with orjson and sent as they are fetched, so large pages
+        # are never materialised as one list or one serialized body. The first chunk
+        # is read here so query failures still get a 500 instead of a truncated 200
+        stream = _stream_facilities(page_stmt, count_stmt, skip, limit)
+        first_chunk = next(stream)
+        return StreamingResponse(
+            chain([first_chunk], stream),
+            media_type="application/json",
+            headers=cache_headers(etag)
+        )
         
     except HTTPException:
         raise
@@ -118,173 +207,118 @@ async def get_facilities(
         )
 
 
+# Facility totals by type and average quality score as conditional aggregates
+FACILITY_STATS_COLUMNS = (
+    func.count(Facility.id),
+    func.count(Facility.id).filter(Facility.facility_type == "hospital"),
+    func.count(Facility.id).filter(Facility.facility_type == "clinic"),
+    func.avg(Facility.quality_score),
+)
+
+
+def _stats_from_row(total: int, hospitals: int, clinics: int, avg_score) -> dict:
+    """Stats response from the FACILITY_STATS_COLUMNS values"""
+    return {
+        "total": total,
+        "hospitals": hospitals,
+        "clinics": clinics,
+        "average_quality_score": round(float(avg_score or 0), 2)
+    }
+
+
+def _compute_stats(db: Session) -> dict:
+    """Facility totals by type and average quality score in a single aggregate query"""
+    return _stats_from_row(*db.query(*FACILITY_STATS_COLUMNS).one())
+
+
 @router.get("/facilities/stats")
-async def get_facility_stats(db: Session = Depends(get_db)):
+def get_facility_stats(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Get statistics about facilities in the database
     """
     try:
-        total = db.query(Facility).count()
-        hospitals = db.query(Facility).filter(Facility.facility_type == "hospital").count()
-        clinics = db.query(Facility).filter(Facility.facility_type == "clinic").count()
-        
-        # Get average quality score
-        avg_score_result = db.query(
-            func.avg(Facility.quality_score)
-        ).scalar()
-        avg_score = round(float(avg_score_result or 0), 2)
+        version = get_facility_data_version(db)
+        etag = make_etag("facility-stats", version)
+        not_modified = not_modified_response(request, etag)
+        if not_modified:
+            return not_modified
+        response.headers.update(cache_headers(etag))
         
-        return {
-            "total": total,
-            "hospitals": hospitals,
-            "clinics": clinics,
-            "average_quality_score": avg_score
-        }
+        # Keyed on the data version, so any facility write makes old entries unreachable
+        return response_cache.get_or_compute((FACILITY_STATS_CACHE, version), lambda: _compute_stats(db))
     except Exception as e:
         logger.error(f"Error fetching facility stats: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {str(e)}")
 
 
+def _count_facilities_by_state(db: Session) -> List[dict]:
+    """Facility counts per Malaysian state, sorted by count descending"""
+    # State is resolved and stored during ETL (NULL outside Malaysia), so this is one
+    # indexed aggregate instead of per-row tag/address inference
+    facility_count = func.count(Facility.id)
+    rows = db.query(Facility.state, facility_count).filter(
+        Facility.state.isnot(None)
+    ).group_by(Facility.state).order_by(facility_count.desc(), Facility.state).all()
+    
+    return [{"name": state, "facilities": count} for state, count in rows]
+
+
 @router.get("/facilities/by-state")
-async def get_facilities_by_state(db: Session = Depends(get_db)):
+def get_facilities_by_state(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Get facility counts grouped by state from OSM tags (addr:state)
     """
     try:
-        # Get all facilities with their OSM tags
-        facilities = db.query(Facility).all()
-        
-        # Load comprehensive city-to-state mapping (includes DOSM data if available)
-        city_to_state_mapping = get_comprehensive_city_state_mapping(db)
-        
-        state_counts = {}
-        extraction_stats = {"addr_state": 0, "addr_province": 0, "is_in_state": 0, "city_mapping": 0, "address_parsing": 0, "coordinate_lookup": 0, "unknown": 0}
-        
-        for facility in facilities:
-            state = "Unknown"
-            extraction_method = "unknown"
-            if facility.osm_tags:
-                # Prioritize state from OSM tags (check multiple possible fields)
-                if facility.osm_tags.get("addr:state"):
-                    raw_state = facility.osm_tags.get("addr:state")
-                    state = normalize_state_name(raw_state)
-                    extraction_method = "addr_state"
-                    extraction_stats["addr_state"] += 1
-                elif facility.osm_tags.get("addr:province"):
-                    raw_state = facility.osm_tags.get("addr:province")
-                    state = normalize_state_name(raw_state)
-                    extraction_method = "addr_province"
-                    extraction_stats["addr_province"] += 1
-                elif facility.osm_tags.get("is_in:state"):
-                    raw_state = facility.osm_tags.get("is_in:state")
-                    state = normalize_state_name(raw_state)
-                    extraction_method = "is_in_state"
-                    extraction_stats["is_in_state"] += 1
-            
-            # Fallback 1: Map city name to state using comprehensive mapping (includes DOSM data)
-            if state == "Unknown" and facility.address:
-                address_lower = facility.address.lower()
-                matched_city = None
-                # Use word boundary matching to avoid false positives
-                # Check if city name appears as a whole word (not substring)
-                import re
-                for city, mapped_state in city_to_state_mapping.items():
-                    # Use word boundaries to match whole words only
-                    # This prevents matching "selangor" in "selangor street" when looking for cities
-                    pattern = r'\b' + re.escape(city) + r'\b'
-                    if re.search(pattern, address_lower):
-                        matched_city = city
-                        state = mapped_state
-                        extraction_method = "city_mapping"
-                        extraction_stats["city_mapping"] += 1
-                        break
-            
-            # Fallback 2: Try to extract from address parts (last resort)
-            if state == "Unknown" and facility.address:
-                address_parts = [p.strip() for p in facility.address.split(",")]
-                # Only use address parsing if we have 3+ parts (likely has state info)
-                if len(address_parts) >= 3:
-                    # Check if any part matches a known state name
-                    known_states = ["selangor", "johor", "sabah", "sarawak", "perak", "penang",
-                                   "kedah", "kelantan", "terengganu", "pahang", "melaka", "malacca",
-                                   "negeri sembilan", "perlis", "kuala lumpur", "putrajaya",
-                                   "labuan", "singapore"]
-                    for part in reversed(address_parts):
-                        part_lower = part.lower().strip()
-                        if part_lower in known_states:
-                            state = normalize_state_name(part)
-                            extraction_method = "address_parsing"
-                            extraction_stats["address_parsing"] += 1
-                            break
-            
-            # Fallback 3: Use coordinates to determine state (last resort)
-            if state == "Unknown" and facility.latitude and facility.longitude:
-                coord_state = get_state_from_coordinates(facility.latitude, facility.longitude)
-                if coord_state:
-                    state = coord_state
-                    extraction_method = "coordinate_lookup"
-                    extraction_stats["coordinate_lookup"] = extraction_stats.get("coordinate_lookup", 0) + 1
-            
-            if state == "Unknown":
-                extraction_stats["unknown"] += 1
-            
-            # Count by state
-            if state not in state_counts:
-                state_counts[state] = 0
-            state_counts[state] += 1
+        version = get_facility_data_version(db)
+        etag = make_etag("facilities-by-state", version)
+        not_modified = not_modified_response(request, etag)
+        if not_modified:
+            return not_modified
+        response.headers.update(cache_headers(etag))
         
-        # Define valid Malaysian states (13 states + 3 federal territories)
-        malaysian_states = {
-            "Selangor", "Johor", "Perak", "Kedah", "Sarawak", "Sabah",
-            "Kelantan", "Terengganu", "Pahang", "Negeri Sembilan",
-            "Melaka", "Perlis", "Penang",
-            "Kuala Lumpur", "Putrajaya", "Labuan"
-        }
-        
-        # Convert to list format for frontend, sorted by count descending
-        # Filter to only include Malaysian states
-        state_data = [
-            {"name": state, "facilities": count}
-            for state, count in sorted(state_counts.items(), key=lambda x: x[1], reverse=True)
-            if state in malaysian_states
-        ]
-        
-        return state_data
+        return response_cache.get_or_compute((FACILITIES_BY_STATE_CACHE, version), lambda: _count_facilities_by_state(db))
     except Exception as e:
         logger.error(f"Error fetching facilities by state: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch facilities by state: {str(e)}")
 
 
 @router.get("/facilities/{facility_id}")
-async def get_facility(
+def get_facility(
     facility_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Get a single facility by ID
     """
-    facility = db.query(Facility).filter(Facility.id == facility_id).first()
+    etag = make_etag(f"facility-{facility_id}", get_facility_data_version(db))
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+    
+    facility = db.execute(
+        select(*FACILITY_LIST_COLUMNS, Facility.osm_tags, Facility.created_at, Facility.updated_at).where(
+            Facility.id == facility_id
+        )
+    ).mappings().first()
     if not facility:
         raise HTTPException(status_code=404, detail=f"Facility with ID {facility_id} not found")
     
+    headers = cache_headers(etag, last_modified=facility["updated_at"])
+    if not_modified_since(request, facility["updated_at"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return {
-        "id": facility.id,
-        "osm_id": facility.osm_id,
-        "name": facility.name,
-        "type": facility.facility_type,
-        "location": {"lat": facility.latitude, "lng": facility.longitude},
-        "address": facility.address or "",
-        "contact": facility.contact or "",
-        "lastUpdated": facility.last_updated_osm.isoformat() if facility.last_updated_osm else "",
-        "score": facility.quality_score,
-        "osm_tags": facility.osm_tags,
-        "created_at": facility.created_at.isoformat(),
-        "updated_at": facility.updated_at.isoformat()
+        **_facility_to_dict(facility),
+        "osm_tags": facility["osm_tags"],
+        "created_at": facility["created_at"].isoformat(),
+        "updated_at": facility["updated_at"].isoformat()
     }
 
 
 @router.get("/health/database")
-async def check_database_health(db: Session = Depends(get_db)):
+def check_database_health(db: Session = Depends(get_db)):
     """
     Check database connection and PostGIS status
     """
@@ -292,10 +326,8 @@ async def check_database_health(db: Session = Depends(get_db)):
         # Check basic connection
         db.execute(text("SELECT 1"))
         
-        # Check PostGIS extension
-        postgis_check = db.execute(text("SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'postgis')")).scalar()
-        
-        if not postgis_check:
+        # Check PostGIS extension (looked up once per process, so probes cost one round trip)
+        if not has_postgis():
             return {
                 "connected": True,
                 "postgis_enabled": False,
@@ -320,45 +352,32 @@ async def check_database_health(db: Session = Depends(get_db)):
 
 
 @router.get("/analytics")
-async def get_analytics(db: Session = Depends(get_db)):
+def get_analytics(db: Session = Depends(get_db)):
     """
     Get analytics data for dashboard including active users and facility stats
     """
     try:
-        # Get facility stats directly (reuse logic from get_facility_stats)
-        total = db.query(Facility).count()
-        hospitals = db.query(Facility).filter(Facility.facility_type == "hospital").count()
-        clinics = db.query(Facility).filter(Facility.facility_type == "clinic").count()
-        
-        avg_score_result = db.query(
-            func.avg(Facility.quality_score)
-        ).scalar()
-        avg_score = round(float(avg_score_result or 0), 2)
-        
-        stats = {
-            "total": total,
-            "hospitals": hospitals,
-            "clinics": clinics,
-            "average_quality_score": avg_score
-        }
-        
-        # Calculate active users from recent ETL job activity
-        # Count distinct sources from ETL jobs created in the last 24 hours
+        # Active users: distinct sources from ETL jobs created in the last 24 hours
         # This is a proxy metric until proper user tracking is implemented
-        try:
-            twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
-            recent_sources = db.query(ETLJob.source).filter(
-                ETLJob.created_at >= twenty_four_hours_ago
-            ).distinct().count()
-            
+        # Fetched with the facility stats in one round trip
+        recent_sources = select(func.count(distinct(ETLJob.source))).where(
+            ETLJob.created_at >= func.now() - timedelta(hours=24)
+        ).scalar_subquery()
+        *stats_row, active_users_count = db.query(*FACILITY_STATS_COLUMNS, recent_sources).one()
+        stats = _stats_from_row(*stats_row)
+        
+        if active_users_count == 0:
             # If no recent activity, count distinct sources from all time as fallback
-            if recent_sources == 0:
-                recent_sources = db.query(ETLJob.source).distinct().count()
-            
-            active_users_count = recent_sources
-        except Exception as e:
-            logger.warning(f"Error calculating active users from ETL jobs: {e}")
-            active_users_count = 0
+            # Cached in the ETL jobs namespace, which every job write invalidates,
+            # so idle dashboards don't rescan etl_jobs on each poll
+            try:
+                active_users_count = response_cache.get_or_compute(
+                    (ETL_JOBS_CACHE, "all-time-sources"),
+                    lambda: db.query(ETLJob.source).distinct().count()
+                )
+            except Exception as e:
+                logger.warning(f"Error calculating active users from ETL jobs: {e}")
+                active_users_count = 0
         
         return {
             "active_users": active_users_count,
@@ -1,19 +1,27 @@
 """
 Overpass API proxy routes
 """
+import asyncio
 import logging
-from typing import Optional
+import math
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import httpx
-from fastapi import APIRouter, HTTPException, Request, Depends, Body, Query
-from fastapi.responses import JSONResponse
+import orjson
+from cachetools import LRUCache
+from fastapi import APIRouter, HTTPException, Request, Depends, Body, Query, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from app.config import get_overpass_config
 from app.schemas.overpass import (
     OverpassQueryRequest,
     OverpassQueryResponse,
     FacilitiesResponse,
-    FacilityOSM,
     OverpassHealthResponse
 )
-from app.services.overpass_proxy import get_overpass_service
+from app.services.overpass_proxy import MAP_BATCH_SIZE, OverpassProxyService, get_overpass_service
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +30,86 @@ router = APIRouter()
 # Malaysia bounding box: [south, west, north, east]
 MALAYSIA_BOUNDS = [0.855, 98.942, 7.363, 119.267]
 
+# Final facilities payloads keyed by normalized (state|city|bbox), with their store time.
+# Entries outlive the TTL so a stale copy can be served when Overpass is unavailable
+_facilities_responses: LRUCache = LRUCache(maxsize=256)
+_facilities_responses_lock = threading.Lock()
+
+# Facilities queries in progress, by cache key; identical concurrent requests await the
+# same (payload, cache status) future instead of each querying Overpass (event-loop only)
+_facilities_inflight: Dict[str, asyncio.Future] = {}
+
+# Small bbox queries are composed from fixed grid tiles (TILE_DEG ~ 55 km) cached by
+# (row, col), so overlapping but different bboxes share Overpass results. Larger bboxes
+# (e.g. all of Malaysia, ~570 tiles) are fetched as a single query instead
+TILE_DEG = 0.5
+MAX_TILES_PER_QUERY = 4
+_facility_tiles: LRUCache = LRUCache(maxsize=512)
+_facility_tiles_lock = threading.Lock()
+
+
+# Healthcare facility selectors. Each statement carries its own spatial filter
+# (the grouped syntax doesn't work), so templates are built once at import
+FACILITY_SELECTORS = tuple(
+    f'{element}["{key}"="{value}"]'
+    for key, value in (
+        ("amenity", "hospital"),
+        ("amenity", "clinic"),
+        ("healthcare", "hospital"),
+        ("healthcare", "clinic"),
+        ("healthcare", "health_centre"),
+    )
+    for element in ("node", "way", "relation")
+)
+
+# Area queries: resolve the named boundary relation with map_to_area, then filter by (area)
+_AREA_QUERY_TEMPLATE = (
+    "[out:json][timeout:300];\n"
+    'rel["name"="{name}"]["admin_level"="{admin_level}"]["boundary"="administrative"];\n'
+    "map_to_area;\n"
+    + "\n".join(f"{selector}(area);" for selector in FACILITY_SELECTORS)
+    + "\nout center;"
+)
+
+# Bbox queries: "{bbox}" is filled with "south,west,north,east"
+_BBOX_QUERY_TEMPLATE = (
+    "[out:json][timeout:300];\n"
+    + "\n".join(f"{selector}({{bbox}});" for selector in FACILITY_SELECTORS)
+    + "\nout center;"
+)
+
+
+def _widen_bbox(bounds: list) -> Tuple[float, float, float, float]:
+    """Round [south, west, north, east] outward to 4 decimal places (~11 m), so near-identical bboxes share a query"""
+    # round() first so coordinates already at 4 decimals aren't pushed out by float error
+    south, west, north, east = [round(float(coord) * 10_000, 6) for coord in bounds]
+    return (
+        math.floor(south) / 10_000,
+        math.floor(west) / 10_000,
+        math.ceil(north) / 10_000,
+        math.ceil(east) / 10_000,
+    )
+
+
+@lru_cache(maxsize=256)
+def _build_query_cached(
+    bbox: Optional[Tuple[float, float, float, float]],
+    state_name: Optional[str],
+    city_name: Optional[str]
+) -> str:
+    """Build (and memoize) an Overpass QL query from hashable arguments"""
+    if state_name:
+        # State-level query using admin_level=4 for Malaysian states
+        return _AREA_QUERY_TEMPLATE.format(name=state_name, admin_level=4)
+    
+    if city_name:
+        # City-level query: Use boundary relation (admin_level=8 for cities)
+        # Note: Some cities may not have boundary relations in OSM - those will return empty results
+        return _AREA_QUERY_TEMPLATE.format(name=city_name, admin_level=8)
+    
+    south, west, north, east = bbox
+    return _BBOX_QUERY_TEMPLATE.format(bbox=f"{south},{west},{north},{east}")
+
 
 def build_healthcare_facilities_query(
     bounds: Optional[list] = None,
@@ -29,177 +117,117 @@ def build_healthcare_facilities_query(
     city_name: Optional[str] = None
 ) -> str:
     """Build Overpass QL query for healthcare facilities"""
+    if state_name or city_name:
+        return _build_query_cached(None, state_name, city_name)
     
-    # Base facility tags for area queries - each statement includes (area) filter
-    def build_facility_queries_for_area():
-        """Build individual facility query statements for area queries"""
-        queries = [
-            'node["amenity"="hospital"](area);',
-            'way["amenity"="hospital"](area);',
-            'relation["amenity"="hospital"](area);',
-            'node["amenity"="clinic"](area);',
-            'way["amenity"="clinic"](area);',
-            'relation["amenity"="clinic"](area);',
-            'node["healthcare"="hospital"](area);',
-            'way["healthcare"="hospital"](area);',
-            'relation["healthcare"="hospital"](area);',
-            'node["healthcare"="clinic"](area);',
-            'way["healthcare"="clinic"](area);',
-            'relation["healthcare"="clinic"](area);',
-            'node["healthcare"="health_centre"](area);',
-            'way["healthcare"="health_centre"](area);',
-            'relation["healthcare"="health_centre"](area);'
-        ]
-        return '\n'.join(queries)
-    
-    # For bbox queries, use individual statements
-    facility_tags_bbox = """node["amenity"="hospital"];
-way["amenity"="hospital"];
-relation["amenity"="hospital"];
-node["amenity"="clinic"];
-way["amenity"="clinic"];
-relation["amenity"="clinic"];
-node["healthcare"="hospital"];
-way["healthcare"="hospital"];
-relation["healthcare"="hospital"];
-node["healthcare"="clinic"];
-way["healthcare"="clinic"];
-relation["healthcare"="clinic"];
-node["healthcare"="health_centre"];
-way["healthcare"="health_centre"];
-relation["healthcare"="health_centre"];"""
+    # Default to bbox query; the full-Malaysia query is prebuilt
+    if not bounds or bounds == MALAYSIA_BOUNDS:
+        return _MALAYSIA_QUERY
     
-    if state_name:
-        # State-level query using admin_level=4 for Malaysian states
-        # Use map_to_area pattern for area queries
-        # Each facility query statement includes (area) filter individually
-        facility_queries = build_facility_queries_for_area()
-        query = f"""[out:json][timeout:300];
-rel["name"="{state_name}"]["admin_level"="4"]["boundary"="administrative"];
-map_to_area;
-{facility_queries}
-out center;"""
-        
-        return query
-    
-    elif city_name:
-        # City-level query: Use boundary relation (admin_level=8 for cities)
-        # Use map_to_area pattern for city area queries (admin_level=8 in Malaysia)
-        # Note: Some cities may not have boundary relations in OSM - those will return empty results
-        # Each facility query statement includes (area) filter individually
-        facility_queries = build_facility_queries_for_area()
-        query = f"""[out:json][timeout:300];
-rel["name"="{city_name}"]["admin_level"="8"]["boundary"="administrative"];
-map_to_area;
-{facility_queries}
-out center;"""
-        
-        return query
-    
-    else:
-        # Default to bbox query
-        # Use provided bounds or default to Malaysia
-        if not bounds:
-            bounds = MALAYSIA_BOUNDS
-        
-        # Ensure bounds are floats for proper numeric formatting (no quotes)
-        south, west, north, east = [float(b) for b in bounds]
-        
-        # Pre-format the bbox to avoid any interpolation issues
-        bbox = f"{south},{west},{north},{east}"
-        
-        # Use individual statements for bbox queries (grouped syntax doesn't work)
-        # Each statement needs its own bbox filter
-        bbox_str = f"{bbox}"
-        query_lines = [
-            "[out:json][timeout:300];"
-        ]
-        for line in facility_tags_bbox.strip().split('\n'):
-            if line.strip() and line.strip().endswith(';'):
-                # Add bbox filter to each statement
-                query_lines.append(line.rstrip(';') + f"({bbox_str});")
-        query_lines.append("out center;")
-        query = '\n'.join(query_lines)
-        
-        return query
+    # Widened bboxes only add results, which are clipped to the exact bbox after mapping
+    return _build_query_cached(_widen_bbox(bounds), None, None)
 
 
-def map_osm_to_facility(element: dict) -> Optional[FacilityOSM]:
-    """Map OSM element to FacilityOSM schema"""
-    try:
-        # Extract coordinates
-        location = {"lat": 0.0, "lng": 0.0}
-        if element.get("type") == "node":
-            if "lat" in element and "lon" in element:
-                location = {"lat": float(element["lat"]), "lng": float(element["lon"])}
-        elif element.get("type") in ["way", "relation"]:
-            if "center" in element:
+_MALAYSIA_QUERY = _BBOX_QUERY_TEMPLATE.format(bbox=",".join(str(float(b)) for b in MALAYSIA_BOUNDS))
+
+
+# Tag values shorter than this are interned; longer ones (names, addresses) are mostly unique
+INTERN_MAX_LEN = 32
+
+# Tags joined (in order) into the address when addr:full is missing
+ADDRESS_TAGS = ("addr:street", "addr:city", "addr:postcode", "addr:state")
+
+
+def map_osm_elements(elements: List[dict], bounds: Optional[List[float]] = None) -> List[dict]:
+    """
+    Map OSM elements to facility dicts with FacilityOSM's fields in a single pass
+    
+    Elements without usable coordinates, or (when bounds are given) whose point falls
+    outside [south, west, north, east], are skipped before any other work. Output is
+    plain dicts so hot response paths can serialize without building models.
+    """
+    if bounds:
+        south, west, north, east = [float(coord) for coord in bounds]
+    facilities = []
+    append = facilities.append
+    intern = sys.intern
+    for element in elements:
+        try:
+            # Extract coordinates
+            element_type = element.get("type")
+            if element_type == "node":
+                if "lat" not in element or "lon" not in element:
+                    continue
+                lat, lng = float(element["lat"]), float(element["lon"])
+            elif element_type == "way" or element_type == "relation":
+                if "center" not in element:
+                    continue
                 center = element["center"]
-                location = {"lat": float(center.get("lat", 0)), "lng": float(center.get("lon", 0))}
-        
-        # Skip if no valid coordinates
-        if location["lat"] == 0.0 and location["lng"] == 0.0:
-            return None
-        
-        # Determine facility type
-        tags = element.get("tags", {})
-        amenity = tags.get("amenity", "").lower()
-        healthcare = tags.get("healthcare", "").lower()
-        
-        facility_type = "clinic"  # Default
-        if amenity == "hospital" or healthcare == "hospital":
-            facility_type = "hospital"
-        elif amenity == "clinic" or healthcare in ["clinic", "health_centre"]:
-            facility_type = "clinic"
-        
-        # Calculate quality score
-        score = 0
-        if tags.get("name"):
-            score += 25
-        if tags.get("amenity") or tags.get("healthcare"):
-            score += 20
-        if tags.get("operator"):
-            score += 15
-        if tags.get("phone") or tags.get("contact:phone"):
-            score += 10
-        if tags.get("addr:full") or tags.get("addr:street"):
-            score += 15
-        if location["lat"] != 0 and location["lng"] != 0:
-            score += 15
-        
-        # Build address
-        address = tags.get("addr:full", "")
-        if not address:
-            parts = []
-            if tags.get("addr:street"):
-                parts.append(tags["addr:street"])
-            if tags.get("addr:city"):
-                parts.append(tags["addr:city"])
-            if tags.get("addr:postcode"):
-                parts.append(tags["addr:postcode"])
-            if tags.get("addr:state"):
-                parts.append(tags["addr:state"])
-            address = ", ".join(parts) if parts else f"{location['lat']:.4f}, {location['lng']:.4f}"
-        
-        # Get last updated
-        last_updated = element.get("timestamp", "")
-        if not last_updated:
-            last_updated = ""
-        
-        return FacilityOSM(
-            id=f"{element.get('type', 'unknown')}-{element.get('id', 'unknown')}",
-            name=tags.get("name", "Unnamed Facility"),
-            type=facility_type,
-            location=location,
-            address=address,
-            contact=tags.get("phone") or tags.get("contact:phone"),
-            lastUpdated=last_updated,
-            score=min(score, 100),
-            osm_tags=tags
-        )
-    except Exception as e:
-        logger.warning(f"Error mapping OSM element to facility: {e}")
-        return None
+                lat, lng = float(center.get("lat", 0)), float(center.get("lon", 0))
+            else:
+                continue
+            
+            # Skip if no valid coordinates
+            if lat == 0.0 and lng == 0.0:
+                continue
+            
+            # Way/relation centers can fall just outside the queried bbox
+            if bounds and not (south <= lat <= north and west <= lng <= east):
+                continue
+            
+            # Mapped facilities are cached, so collapse the heavily repeated tag keys and
+            # short values ("amenity", "hospital", state names...) to one object each
+            tags = element.get("tags")
+            if tags:
+                tags = {
+                    intern(key): intern(value) if type(value) is str and len(value) < INTERN_MAX_LEN else value
+                    for key, value in tags.items()
+                }
+            else:
+                tags = {}
+            get = tags.get
+            
+            # Determine facility type (default clinic). OSM values are nearly always
+            # lowercase, so only lowercase when the exact comparison misses
+            amenity = get("amenity", "")
+            healthcare = get("healthcare", "")
+            facility_type = "hospital" if (
+                amenity == "hospital" or healthcare == "hospital"
+                or amenity.lower() == "hospital" or healthcare.lower() == "hospital"
+            ) else "clinic"
+            
+            # Calculate quality score (weights sum to 100, so no clamping is needed)
+            phone = get("phone") or get("contact:phone")
+            score = (
+                (25 if get("name") else 0)
+                + (20 if amenity or healthcare else 0)
+                + (15 if get("operator") else 0)
+                + (10 if phone else 0)
+                + (15 if get("addr:full") or get("addr:street") else 0)
+                + (15 if lat != 0 and lng != 0 else 0)
+            )
+            
+            # Build address
+            address = get("addr:full", "")
+            if not address:
+                parts = [tags[key] for key in ADDRESS_TAGS if get(key)]
+                address = ", ".join(parts) if parts else f"{lat:.4f}, {lng:.4f}"
+            
+            append({
+                "id": f"{element.get('type', 'unknown')}-{element.get('id', 'unknown')}",
+                "name": get("name", "Unnamed Facility"),
+                "type": facility_type,
+                "location": {"lat": lat, "lng": lng},
+                "address": address,
+                "contact": phone,
+                "lastUpdated": element.get("timestamp") or "",
+                "score": score,
+                "osm_tags": tags
+            })
+        except Exception as e:
+            logger.warning(f"Error mapping OSM element to facility: {e}")
+    
+    return facilities
 
 
 def get_client_id(request: Request) -> str:
@@ -209,10 +237,351 @@ def get_client_id(request: Request) -> str:
     return "unknown"
 
 
+def _facilities_cache_key(
+    bbox: Optional[List[float]],
+    state_name: Optional[str],
+    city_name: Optional[str]
+) -> str:
+    """Normalized facilities cache key; bbox coordinates are rounded to 4 decimal places (~11 m)"""
+    bbox_key = ",".join(f"{coord:.4f}" for coord in bbox) if bbox else ""
+    return f"{state_name or ''}|{city_name or ''}|{bbox_key}"
+
+
+def _bbox_contains(outer: List[float], inner: List[float]) -> bool:
+    """Whether bbox outer fully contains bbox inner (both [south, west, north, east])"""
+    o_south, o_west, o_north, o_east = [float(coord) for coord in outer]
+    i_south, i_west, i_north, i_east = [float(coord) for coord in inner]
+    return o_south <= i_south and o_west <= i_west and i_north <= o_north and i_east <= o_east
+
+
+def _within_bounds(facilities: List[dict], bounds: List[float]) -> List[dict]:
+    """Facilities whose location falls inside [south, west, north, east]"""
+    south, west, north, east = [float(coord) for coord in bounds]
+    return [
+        facility for facility in facilities
+        if south <= facility["location"]["lat"] <= north and west <= facility["location"]["lng"] <= east
+    ]
+
+
+def _cached_superset(bounds: List[float], ttl: float) -> Optional[List[dict]]:
+    """
+    Facilities from a fresh cached bbox query whose bbox contains bounds, if any
+    
+    Bbox-query payloads are already clipped to their bbox, so clipping one to a
+    sub-bbox gives the same result as querying Overpass for the sub-bbox.
+    """
+    now = time.monotonic()
+    with _facilities_responses_lock:
+        entries = list(_facilities_responses.items())
+    for key, (stored_at, payload) in entries:
+        # Area queries (state/city in the key) aren't clipped to their reported bbox
+        if not key.startswith("||") or now - stored_at >= ttl:
+            continue
+        if _bbox_contains(payload["bbox"], bounds):
+            return _within_bounds(payload["facilities"], bounds)
+    return None
+
+
+def _tiles_for(bounds: List[float]) -> List[Tuple[int, int]]:
+    """Grid tiles (row, col) overlapping [south, west, north, east]"""
+    south, west, north, east = [float(coord) for coord in bounds]
+    return [
+        (row, col)
+        for row in range(math.floor(south / TILE_DEG), math.ceil(north / TILE_DEG))
+        for col in range(math.floor(west / TILE_DEG), math.ceil(east / TILE_DEG))
+    ]
+
+
+def _tile_bounds(tile: Tuple[int, int]) -> List[float]:
+    """[south, west, north, east] of a grid tile"""
+    row, col = tile
+    return [row * TILE_DEG, col * TILE_DEG, (row + 1) * TILE_DEG, (col + 1) * TILE_DEG]
+
+
+async def _fetch_tiled_facilities(
+    service: OverpassProxyService,
+    client_id: str,
+    tiles: List[Tuple[int, int]],
+    bounds: List[float],
+    ttl: float
+) -> Tuple[List[dict], str]:
+    """
+    Compose a bbox query's facilities from grid tiles, fetching missing tiles concurrently
+    
+    Returns the facilities clipped to bounds and the cache status (HIT if every tile was
+    fresh, STALE if an expired tile had to stand in for a failed fetch, else MISS).
+    """
+    now = time.monotonic()
+    with _facility_tiles_lock:
+        entries = {tile: _facility_tiles.get(tile) for tile in tiles}
+    missing = [tile for tile, entry in entries.items() if not entry or now - entry[0] >= ttl]
+    
+    results = await asyncio.gather(*(
+        service.execute_mapped_query(
+            query=build_healthcare_facilities_query(bounds=_tile_bounds(tile)),
+            mapper=lambda elements, tile_bounds=_tile_bounds(tile): map_osm_elements(elements, tile_bounds),
+            client_id=client_id
+        )
+        for tile in missing
+    ), return_exceptions=True)
+    
+    # Store every successful tile before raising on a failed one
+    fetched = {tile: result for tile, result in zip(missing, results) if isinstance(result, list)}
+    with _facility_tiles_lock:
+        for tile, facilities in fetched.items():
+            entries[tile] = (time.monotonic(), facilities)
+            _facility_tiles[tile] = entries[tile]
+    
+    cache_status = "MISS" if missing else "HIT"
+    for tile, result in zip(missing, results):
+        if tile in fetched:
+            continue
+        if not isinstance(result, httpx.HTTPError) or not entries[tile]:
+            raise result
+        logger.warning(f"Overpass API unavailable, serving stale facilities for tile {tile}: {result}")
+        cache_status = "STALE"
+    
+    # Facilities on a shared tile edge are in both tiles
+    unique: Dict[str, dict] = {}
+    for _, facilities in entries.values():
+        for facility in facilities:
+            unique.setdefault(facility["id"], facility)
+    return _within_bounds(list(unique.values()), bounds), cache_status
+
+
+def _facilities_http_exception(e: Exception) -> HTTPException:
+    """Translate a failed facilities query into the HTTP error returned to clients"""
+    if isinstance(e, ValueError):
+        # Rate limit error
+        return HTTPException(status_code=429, detail=str(e))
+    if isinstance(e, httpx.HTTPStatusError):
+        status_code = e.response.status_code if e.response else None
+        logger.error(f"Overpass API HTTP error: {status_code} - {str(e)}")
+        if status_code == 504:
+            return HTTPException(
+                status_code=503,
+                detail="Overpass API is temporarily unavailable (timeout). Please try again in a few moments."
+            )
+        elif status_code and status_code >= 500:
+            return HTTPException(
+                status_code=503,
+                detail=f"Overpass API service error ({status_code}). Please try again later."
+            )
+        return HTTPException(status_code=500, detail=f"Overpass API error: {str(e)}")
+    if isinstance(e, httpx.RequestError):
+        logger.error(f"Overpass API request error: {e}")
+        return HTTPException(
+            status_code=503,
+            detail="Unable to connect to Overpass API. Please try again later."
+        )
+    logger.error(f"Error fetching healthcare facilities: {e}")
+    return HTTPException(status_code=500, detail=f"Failed to fetch facilities: {str(e)}")
+
+
+def _parse_bbox_param(bbox: Optional[str]) -> Optional[List[float]]:
+    """Parse a "south,west,north,east" query parameter (None unless it has 4 coordinates)"""
+    if not bbox:
+        return None
+    try:
+        parts = [float(x.strip()) for x in bbox.split(",")]
+    except (ValueError, AttributeError):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid bbox format. Expected: south,west,north,east"
+        )
+    return parts if len(parts) == 4 else None
+
+
+def _resolve_facilities_query(
+    bbox: Optional[list],
+    state_name: Optional[str],
+    city_name: Optional[str]
+) -> Tuple[str, Optional[List[float]], bool]:
+    """
+    Build the facilities query for the request parameters
+    
+    Returns:
+        (query, bounds queried and cached under, whether results are clipped to bounds)
+    """
+    # Every facility is in Malaysia: a bbox covering it is the (prebuilt) Malaysia-wide query
+    if bbox and len(bbox) == 4 and not (state_name or city_name) and _bbox_contains(bbox, MALAYSIA_BOUNDS):
+        bbox = MALAYSIA_BOUNDS
+    
+    # Build query based on parameters
+    if state_name or city_name:
+        # Use area-based query
+        query = build_healthcare_facilities_query(
+            bounds=None,
+            state_name=state_name,
+            city_name=city_name
+        )
+    else:
+        # Use bbox query
+        bounds = bbox if bbox and len(bbox) == 4 else MALAYSIA_BOUNDS
+        query = build_healthcare_facilities_query(bounds=bounds)
+    
+    # Determine bounds for response
+    bounds = bbox if bbox and len(bbox) == 4 else (None if state_name or city_name else MALAYSIA_BOUNDS)
+    return query, bounds, not (state_name or city_name)
+
+
+def _facilities_response(
+    payload: dict,
+    cache_status: str,
+    bbox: Optional[List[float]] = None
+) -> ORJSONResponse:
+    """
+    Serve a facilities payload, marking whether it came from the cache (X-Cache: HIT/MISS/STALE)
+    
+    bbox, if given, is reported instead of the bounds the payload was queried with.
+    """
+    content = {**payload, "cached": cache_status != "MISS"}
+    if bbox:
+        content["bbox"] = bbox
+    return ORJSONResponse(content, headers={"X-Cache": cache_status})
+
+
+async def _fetch_facilities(
+    service: OverpassProxyService,
+    client_id: str,
+    query: str,
+    bounds: Optional[List[float]],
+    cache_key: str,
+    clip: bool = False,
+    bbox: Optional[List[float]] = None
+) -> ORJSONResponse:
+    """
+    Run a facilities query and map the OSM elements, caching the final payload
+    
+    Fresh cached payloads skip Overpass and the mapping loop entirely; an expired one
+    is still served (X-Cache: STALE) if Overpass is unreachable or returns an error.
+    Concurrent requests for the same uncached payload share a single Overpass query.
+    With clip (bbox queries), elements outside bounds are dropped before mapping, a
+    fresh cached payload for a containing bbox is reused instead of querying Overpass,
+    and bboxes spanning at most MAX_TILES_PER_QUERY grid tiles are composed from tiles.
+    bbox is the caller's bbox, reported when it differs from the queried bounds.
+    """
+    ttl = get_overpass_config()["facilities_cache_ttl"]
+    with _facilities_responses_lock:
+        cached = _facilities_responses.get(cache_key)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return _facilities_response(cached[1], "HIT", bbox)
+    
+    # Single flight: later identical requests wait for the query already in progress
+    inflight = _facilities_inflight.get(cache_key)
+    if inflight is not None:
+        try:
+            payload, cache_status = await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # Only the leading request was cancelled (e.g. its client disconnected):
+            # start over, so one waiter leads a new query and the rest share it
+            if not inflight.cancelled() or asyncio.current_task().cancelling():
+                raise
+            return await _fetch_facilities(service, client_id, query, bounds, cache_key, clip, bbox)
+        return _facilities_response(payload, cache_status, bbox)
+    
+    inflight = asyncio.get_running_loop().create_future()
+    _facilities_inflight[cache_key] = inflight
+    try:
+        payload, cache_status = await _load_facilities(
+            service, client_id, query, bounds, cache_key, clip, ttl, cached
+        )
+    except Exception as e:
+        inflight.set_exception(e)
+        # Waiters (if any) re-raise it; don't warn that it was never retrieved
+        inflight.exception()
+        raise
+    except BaseException:
+        inflight.cancel()
+        raise
+    else:
+        inflight.set_result((payload, cache_status))
+    finally:
+        del _facilities_inflight[cache_key]
+    return _facilities_response(payload, cache_status, bbox)
+
+
+async def _load_facilities(
+    service: OverpassProxyService,
+    client_id: str,
+    query: str,
+    bounds: Optional[List[float]],
+    cache_key: str,
+    clip: bool,
+    ttl: float,
+    cached: Optional[Tuple[float, dict]]
+) -> Tuple[dict, str]:
+    """Build (and cache) a facilities payload for _fetch_facilities. Returns (payload, cache status)."""
+    # Nothing falls outside a bbox covering the Malaysia extent, so skip the filtering
+    clip = clip and bool(bounds) and not _bbox_contains(bounds, MALAYSIA_BOUNDS)
+    facilities = _cached_superset(bounds, ttl) if clip else None
+    cache_status = "HIT"
+    tiles = _tiles_for(bounds) if clip else None
+    
+    # Elements are mapped straight to response dicts as the response streams in
+    # (every mapped facility is a hospital or clinic)
+    clip_bounds = bounds if clip else None
+    try:
+        if facilities is None and tiles and len(tiles) <= MAX_TILES_PER_QUERY:
+            facilities, cache_status = await _fetch_tiled_facilities(service, client_id, tiles, bounds, ttl)
+        elif facilities is None:
+            facilities = await service.execute_mapped_query(
+                query=query,
+                mapper=lambda elements: map_osm_elements(elements, clip_bounds),
+                client_id=client_id
+            )
+            cache_status = "MISS"
+    except httpx.HTTPError as e:
+        if cached:
+            logger.warning(f"Overpass API unavailable, serving stale facilities for '{cache_key}': {e}")
+            return cached[1], "STALE"
+        raise
+    
+    payload = {
+        "facilities": facilities,
+        "count": len(facilities),
+        "bbox": [float(coord) for coord in bounds] if bounds else None,
+        "cached": False
+    }
+    # Payloads built from stale tiles aren't cached, so the next request retries them
+    if cache_status != "STALE":
+        with _facilities_responses_lock:
+            _facilities_responses[cache_key] = (time.monotonic(), payload)
+    return payload, cache_status
+
+
+async def _facilities_core(
+    service: OverpassProxyService,
+    client_id: str,
+    bbox: Optional[list],
+    state_name: Optional[str],
+    city_name: Optional[str]
+) -> ORJSONResponse:
+    """Shared implementation of the facilities routes, once each has parsed its parameters"""
+    if state_name and city_name:
+        raise HTTPException(
+            status_code=400,
+            detail="Specify either state_name or city_name, not both."
+        )
+    
+    try:
+        query, bounds, clip = _resolve_facilities_query(bbox, state_name, city_name)
+        # A bbox containing Malaysia shares the Malaysia query and cache entry, but the
+        # response still reports the bbox the caller sent
+        return await _fetch_facilities(
+            service, client_id, query, bounds, _facilities_cache_key(bounds, state_name, city_name),
+            clip=clip,
+            bbox=[float(coord) for coord in bbox] if bbox and len(bbox) == 4 else None
+        )
+    except Exception as e:
+        raise _facilities_http_exception(e)
+
+
 @router.post("/query", response_model=OverpassQueryResponse)
 async def execute_overpass_query(
     request_data: OverpassQueryRequest,
-    request: Request
+    request: Request,
+    service: OverpassProxyService = Depends(get_overpass_service)
 ):
     """
     Execute a raw Overpass QL query through the proxy
@@ -221,17 +590,18 @@ async def execute_overpass_query(
     with caching and rate limiting applied.
     """
     try:
-        service = get_overpass_service()
         client_id = get_client_id(request)
         
         # Execute query
-        response_data = await service.execute_query(
+        body = await service.execute_raw_query(
             query=request_data.query,
             client_id=client_id,
             use_cache=True
         )
         
-        return OverpassQueryResponse(**response_data)
+        # Passed through as-is: Overpass already returned JSON, so the body is neither
+        # parsed, validated nor re-serialized (response_model documents it)
+        return Response(content=body, media_type="application/json")
     
     except ValueError as e:
         # Rate limit error
@@ -242,12 +612,11 @@ async def execute_overpass_query(
 
 
 @router.get("/health", response_model=OverpassHealthResponse)
-async def check_overpass_health():
+async def check_overpass_health(service: OverpassProxyService = Depends(get_overpass_service)):
     """
     Check the health status of the Overpass API instance
     """
     try:
-        service = get_overpass_service()
         health = await service.check_health()
         return OverpassHealthResponse(**health)
     except Exception as e:
@@ -264,7 +633,8 @@ async def get_healthcare_facilities(
     request: Request,
     bbox: Optional[list] = Body(None),
     state_name: Optional[str] = Body(None, description="Filter by state name (e.g., Selangor)"),
-    city_name: Optional[str] = Body(None, description="Filter by city name (e.g., Kuala Lumpur)")
+    city_name: Optional[str] = Body(None, description="Filter by city name (e.g., Kuala Lumpur)"),
+    service: OverpassProxyService = Depends(get_overpass_service)
 ):
     """
     Get healthcare facilities (hospitals and clinics) for Malaysia
@@ -277,82 +647,7 @@ async def get_healthcare_facilities(
     If not provided, uses Malaysia's full bounding box.
     Note: state_name and city_name cannot be used together.
     """
-    try:
-        # Validate parameters
-        if state_name and city_name:
-            raise HTTPException(
-                status_code=400,
-                detail="Specify either state_name or city_name, not both."
-            )
-        
-        service = get_overpass_service()
-        client_id = get_client_id(request) if request else "default"
-        
-        # Build query based on parameters
-        if state_name or city_name:
-            # Use area-based query
-            query = build_healthcare_facilities_query(
-                bounds=None,
-                state_name=state_name,
-                city_name=city_name
-            )
-        else:
-            # Use bbox query
-            bounds = bbox if bbox and len(bbox) == 4 else MALAYSIA_BOUNDS
-            query = build_healthcare_facilities_query(bounds=bounds)
-        
-        response_data = await service.execute_query(
-            query=query,
-            client_id=client_id,
-            use_cache=True
-        )
-        
-        # Map OSM elements to facilities
-        elements = response_data.get("elements", [])
-        facilities = []
-        for element in elements:
-            facility = map_osm_to_facility(element)
-            if facility:
-                # Filter to only hospitals and clinics
-                if facility.type in ["hospital", "clinic"]:
-                    facilities.append(facility)
-        
-        # Determine bounds for response
-        bounds = bbox if bbox and len(bbox) == 4 else (None if state_name or city_name else MALAYSIA_BOUNDS)
-        
-        return FacilitiesResponse(
-            facilities=facilities,
-            count=len(facilities),
-            bbox=bounds,
-            cached=False  # TODO: Track cache hits in service
-        )
-    
-    except ValueError as e:
-        raise HTTPException(status_code=429, detail=str(e))
-    except httpx.HTTPStatusError as e:
-        status_code = e.response.status_code if e.response else None
-        logger.error(f"Overpass API HTTP error: {status_code} - {str(e)}")
-        if status_code == 504:
-            raise HTTPException(
-                status_code=503,
-                detail="Overpass API is temporarily unavailable (timeout). Please try again in a few moments."
-            )
-        elif status_code and status_code >= 500:
-            raise HTTPException(
-                status_code=503,
-                detail=f"Overpass API service error ({status_code}). Please try again later."
-            )
-        else:
-            raise HTTPException(status_code=500, detail=f"Overpass API error: {str(e)}")
-    except httpx.RequestError as e:
-        logger.error(f"Overpass API request error: {e}")
-        raise HTTPException(
-            status_code=503,
-            detail="Unable to connect to Overpass API. Please try again later."
-        )
-    except Exception as e:
-        logger.error(f"Error fetching healthcare facilities: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch facilities: {str(e)}")
+    return await _facilities_core(service, get_client_id(request), bbox, state_name, city_name)
 
 
 @router.get("/facilities/bbox", response_model=FacilitiesResponse)
@@ -361,7 +656,8 @@ async def get_facilities_by_bbox(
     west: float,
     north: float,
     east: float,
-    request: Request
+    request: Request,
+    service: OverpassProxyService = Depends(get_overpass_service)
 ):
     """
     Get healthcare facilities within a bounding box
@@ -372,62 +668,7 @@ async def get_facilities_by_bbox(
     - north: Northern latitude
     - east: Eastern longitude
     """
-    try:
-        bbox = [south, west, north, east]
-        service = get_overpass_service()
-        client_id = get_client_id(request) if request else "default"
-        
-        # Build and execute query directly (don't call POST endpoint)
-        query = build_healthcare_facilities_query(bounds=bbox)
-        
-        response_data = await service.execute_query(
-            query=query,
-            client_id=client_id,
-            use_cache=True
-        )
-        
-        # Map OSM elements to facilities
-        elements = response_data.get("elements", [])
-        facilities = []
-        for element in elements:
-            facility = map_osm_to_facility(element)
-            if facility:
-                if facility.type in ["hospital", "clinic"]:
-                    facilities.append(facility)
-        
-        return FacilitiesResponse(
-            facilities=facilities,
-            count=len(facilities),
-            bbox=bbox,
-            cached=False
-        )
-    
-    except ValueError as e:
-        raise HTTPException(status_code=429, detail=str(e))
-    except httpx.HTTPStatusError as e:
-        status_code = e.response.status_code if e.response else None
-        logger.error(f"Overpass API HTTP error: {status_code} - {str(e)}")
-        if status_code == 504:
-            raise HTTPException(
-                status_code=503,
-                detail="Overpass API is temporarily unavailable (timeout). Please try again in a few moments."
-            )
-        elif status_code and status_code >= 500:
-            raise HTTPException(
-                status_code=503,
-                detail=f"Overpass API service error ({status_code}). Please try again later."
-            )
-        else:
-            raise HTTPException(status_code=500, detail=f"Overpass API error: {str(e)}")
-    except httpx.RequestError as e:
-        logger.error(f"Overpass API request error: {e}")
-        raise HTTPException(
-            status_code=503,
-            detail="Unable to connect to Overpass API. Please try again later."
-        )
-    except Exception as e:
-        logger.error(f"Error fetching healthcare facilities: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch facilities: {str(e)}")
+    return await _facilities_core(service, get_client_id(request), [south, west, north, east], None, None)
 
 
 @router.get("/facilities", response_model=FacilitiesResponse)
@@ -435,7 +676,8 @@ async def get_facilities_by_location(
     request: Request,
     state_name: Optional[str] = Query(None, description="Filter by state name (e.g., Selangor, Johor)"),
     city_name: Optional[str] = Query(None, description="Filter by city name (e.g., Kuala Lumpur, Penang)"),
-    bbox: Optional[str] = Query(None, description="Bounding box as comma-separated string: south,west,north,east")
+    bbox: Optional[str] = Query(None, description="Bounding box as comma-separated string: south,west,north,east"),
+    service: OverpassProxyService = Depends(get_overpass_service)
 ):
     """
     Get healthcare facilities filtered by state or city name
@@ -447,24 +689,72 @@ async def get_facilities_by_location(
     
     Note: state_name and city_name cannot be used together.
     """
-    # Parse bbox if provided
-    parsed_bbox = None
-    if bbox:
+    return await _facilities_core(service, get_client_id(request), _parse_bbox_param(bbox), state_name, city_name)
+
+
+@router.get("/facilities/stream")
+async def stream_facilities_by_location(
+    request: Request,
+    state_name: Optional[str] = Query(None, description="Filter by state name (e.g., Selangor, Johor)"),
+    city_name: Optional[str] = Query(None, description="Filter by city name (e.g., Kuala Lumpur, Penang)"),
+    bbox: Optional[str] = Query(None, description="Bounding box as comma-separated string: south,west,north,east"),
+    service: OverpassProxyService = Depends(get_overpass_service)
+):
+    """
+    Stream healthcare facilities as NDJSON (one facility object per line)
+    
+    Takes the same parameters as GET /facilities. Facilities are written as the Overpass
+    response is parsed and mapped, so clients can render them progressively; a fresh
+    cached payload for the same parameters is streamed without querying Overpass.
+    """
+    if state_name and city_name:
+        raise HTTPException(
+            status_code=400,
+            detail="Specify either state_name or city_name, not both."
+        )
+    
+    client_id = get_client_id(request)
+    query, bounds, clip = _resolve_facilities_query(_parse_bbox_param(bbox), state_name, city_name)
+    clip_bounds = bounds if clip and not _bbox_contains(bounds, MALAYSIA_BOUNDS) else None
+    
+    with _facilities_responses_lock:
+        cached = _facilities_responses.get(_facilities_cache_key(bounds, state_name, city_name))
+    if cached and time.monotonic() - cached[0] < get_overpass_config()["facilities_cache_ttl"]:
+        async def cached_batches():
+            facilities = cached[1]["facilities"]
+            for start in range(0, len(facilities), MAP_BATCH_SIZE):
+                yield facilities[start:start + MAP_BATCH_SIZE]
+        batches = cached_batches()
+        cache_status = "HIT"
+    else:
+        batches = service.iter_mapped_query(
+            query=query,
+            mapper=lambda elements: map_osm_elements(elements, clip_bounds),
+            client_id=client_id
+        )
+        cache_status = "MISS"
+    
+    # Wait for the first batch so rate limits and Overpass errors still get a proper status
+    try:
+        first = await batches.__anext__()
+    except StopAsyncIteration:
+        first = []
+    except Exception as e:
+        raise _facilities_http_exception(e)
+    
+    async def ndjson():
         try:
-            parts = [float(x.strip()) for x in bbox.split(",")]
-            if len(parts) == 4:
-                parsed_bbox = parts
-        except (ValueError, AttributeError):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid bbox format. Expected: south,west,north,east"
-            )
+            batch = first
+            while True:
+                if batch:
+                    yield b"".join([orjson.dumps(facility, option=orjson.OPT_APPEND_NEWLINE) for facility in batch])
+                batch = await batches.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            # Headers are already sent; end the stream early
+            logger.error(f"Error streaming healthcare facilities: {e}")
+        finally:
+            await batches.aclose()
     
-    # Use POST endpoint logic
-    return await get_healthcare_facilities(
-        request=request,
-        bbox=parsed_bbox,
-        state_name=state_name,
-        city_name=city_name
-    )
-
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers={"X-Cache": cache_status})
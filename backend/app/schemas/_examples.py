@@ -0,0 +1,86 @@
+"""
+OpenAPI example payloads for the request/response schemas
+Imported only when a JSON schema is generated (see app.schemas._openapi)
+"""
+
+EXAMPLES = {
+    "ETLJobCreate": {
+        "source": "DHIS2",
+        "status": "Pending"
+    },
+    "ETLJobResponse": {
+        "id": "1",
+        "source": "DHIS2",
+        "status": "Completed",
+        "records_processed": 1250,
+        "start_time": "2024-01-15T10:30:00Z",
+        "errors": 0
+    },
+    "DOSMDatasetCreate": {
+        "dataset_id": "health_statistics_2024",
+        "name": "Health Statistics 2024",
+        "description": "Annual health statistics from DOSM",
+        "source_url": "https://open.dosm.gov.my/api/data/health_statistics_2024",
+        "tier": "tier1_opendosm",
+        "scrape_method": "opendosm_api",
+        "update_frequency": "annually",
+        "confidence": "high",
+        "is_statistical": True
+    },
+    "DOSMDatasetResponse": {
+        "id": 1,
+        "dataset_id": "health_statistics_2024",
+        "name": "Health Statistics 2024",
+        "description": "Annual health statistics from DOSM",
+        "source_url": "https://open.dosm.gov.my/api/data/health_statistics_2024",
+        "tier": "tier1_opendosm",
+        "scrape_method": "opendosm_api",
+        "update_frequency": "annually",
+        "last_checked": "2024-01-15T10:30:00Z",
+        "last_successful_scrape": "2024-01-15T10:35:00Z",
+        "is_statistical": True,
+        "is_active": True,
+        "confidence": "high",
+        "created_at": "2024-01-15T10:00:00Z",
+        "updated_at": "2024-01-15T10:35:00Z"
+    },
+    "RecordMetadata": {
+        "source": "DOSM",
+        "dataset_id": "health_statistics_2024",
+        "source_url": "https://open.dosm.gov.my/api/data/health_statistics_2024",
+        "file_type": "api",
+        "published_date": "2024-01-01T00:00:00Z",
+        "retrieved_at": "2024-01-15T10:30:00Z",
+        "scrape_method": "opendosm_api",
+        "confidence": "high"
+    },
+    "DOSMRecordCreate": {
+        "dataset_id": "health_statistics_2024",
+        "data": {
+            "facility_name": "Hospital ABC",
+            "location": "Kuala Lumpur",
+            "beds": 500
+        },
+        "metadata": {
+            "source": "DOSM",
+            "dataset_id": "health_statistics_2024",
+            "source_url": "https://open.dosm.gov.my/api/data/health_statistics_2024",
+            "file_type": "api",
+            "published_date": "2024-01-01T00:00:00Z",
+            "retrieved_at": "2024-01-15T10:30:00Z",
+            "scrape_method": "opendosm_api",
+            "confidence": "high"
+        }
+    },
+    "ScraperConfig": {
+        "base_url_opendosm": "https://open.dosm.gov.my",
+        "base_url_statsdw": "https://statsdw.dosm.gov.my",
+        "base_url_main": "https://www.dosm.gov.my",
+        "rate_limit_requests_per_minute": 30,
+        "max_retries": 3,
+        "retry_backoff_factor": 2.0,
+        "request_timeout_seconds": 60,
+        "enable_browser_automation": False,
+        "catalog_cache_ttl_seconds": 900
+    },
+}
@@ -0,0 +1,17 @@
+"""
+OpenAPI helpers for schema configuration
+"""
+from typing import Any, Callable, Dict
+
+
+def openapi_example(name: str) -> Callable[[Dict[str, Any]], None]:
+    """
+    json_schema_extra hook that adds a schema's example from app.schemas._examples
+
+    The example payloads are only imported when a JSON schema is generated (e.g. for
+    /openapi.json), not when the models are defined.
+    """
+    def add_example(schema: Dict[str, Any]) -> None:
+        from app.schemas._examples import EXAMPLES
+        schema["example"] = EXAMPLES[name]
+    return add_example
@@ -1,10 +1,11 @@
 """
 Pydantic schemas for DOSM Dataset API requests/responses
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 from app.models.dosm_dataset import ScrapeTier
+from app.schemas._openapi import openapi_example
 
 
 class DOSMDatasetCreate(BaseModel):
@@ -19,20 +20,7 @@ class DOSMDatasetCreate(BaseModel):
     confidence: str = Field(default="high", pattern="^(high|medium|low)$", description="Data confidence level")
     is_statistical: bool = Field(default=True, description="Whether this is statistical reference data")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "dataset_id": "health_statistics_2024",
-                "name": "Health Statistics 2024",
-                "description": "Annual health statistics from DOSM",
-                "source_url": "https://open.dosm.gov.my/api/data/health_statistics_2024",
-                "tier": "tier1_opendosm",
-                "scrape_method": "opendosm_api",
-                "update_frequency": "annually",
-                "confidence": "high",
-                "is_statistical": True
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=openapi_example("DOSMDatasetCreate"))
 
 
 class DOSMDatasetUpdate(BaseModel):
@@ -57,33 +45,17 @@ class DOSMDatasetResponse(BaseModel):
     tier: ScrapeTier
     scrape_method: str
     update_frequency: Optional[str]
-    last_checked: Optional[str]
-    last_successful_scrape: Optional[str]
+    last_checked: Optional[datetime]
+    last_successful_scrape: Optional[datetime]
     is_statistical: bool
     is_active: bool
     confidence: str
-    created_at: str
-    updated_at: str
-
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
-            "example": {
-                "id": 1,
-                "dataset_id": "health_statistics_2024",
-                "name": "Health Statistics 2024",
-                "description": "Annual health statistics from DOSM",
-                "source_url": "https://open.dosm.gov.my/api/data/health_statistics_2024",
-                "tier": "tier1_opendosm",
-                "scrape_method": "opendosm_api",
-                "update_frequency": "annually",
-                "last_checked": "2024-01-15T10:30:00Z",
-                "last_successful_scrape": "2024-01-15T10:35:00Z",
-                "is_statistical": True,
-                "is_active": True,
-                "confidence": "high",
-                "created_at": "2024-01-15T10:00:00Z",
-                "updated_at": "2024-01-15T10:35:00Z"
-            }
-        }
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        defer_build=True,  # Response-only: build the validator/serializer on first use
+        json_schema_extra=openapi_example("DOSMDatasetResponse")
+    )
 
@@ -1,9 +1,10 @@
 """
 Pydantic schemas for DOSM Record with mandatory metadata block
 """
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Dict, Any, Optional, Literal
 from datetime import datetime
+from app.schemas._openapi import openapi_example
 
 
 class RecordMetadata(BaseModel):
@@ -22,36 +23,14 @@ class RecordMetadata(BaseModel):
         "browser_automation"
     ] = Field(..., description="Method used to scrape the data")
     confidence: Literal["high", "medium", "low"] = Field(..., description="Confidence level of the data")
+    # published_date/retrieved_at strings (ISO 8601, "Z" included) are parsed natively by pydantic-core
 
-    @field_validator("retrieved_at", mode="before")
-    @classmethod
-    def parse_retrieved_at(cls, v):
-        if isinstance(v, str):
-            return datetime.fromisoformat(v.replace("Z", "+00:00"))
-        return v
-
-    @field_validator("published_date", mode="before")
-    @classmethod
-    def parse_published_date(cls, v):
-        if v is None:
-            return None
-        if isinstance(v, str):
-            return datetime.fromisoformat(v.replace("Z", "+00:00"))
-        return v
-
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "source": "DOSM",
-                "dataset_id": "health_statistics_2024",
-                "source_url": "https://open.dosm.gov.my/api/data/health_statistics_2024",
-                "file_type": "api",
-                "published_date": "2024-01-01T00:00:00Z",
-                "retrieved_at": "2024-01-15T10:30:00Z",
-                "scrape_method": "opendosm_api",
-                "confidence": "high"
-            }
-        }
+    model_config = ConfigDict(
+        # Immutable once validated; unknown keys are errors rather than silently dropped
+        frozen=True,
+        extra="forbid",
+        json_schema_extra=openapi_example("RecordMetadata")
+    )
 
 
 class DOSMRecordCreate(BaseModel):
@@ -60,27 +39,12 @@ class DOSMRecordCreate(BaseModel):
     data: Dict[str, Any] = Field(..., description="Actual data fields (flexible schema)")
     metadata: RecordMetadata = Field(..., description="Mandatory metadata block")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "dataset_id": "health_statistics_2024",
-                "data": {
-                    "facility_name": "Hospital ABC",
-                    "location": "Kuala Lumpur",
-                    "beds": 500
-                },
-                "metadata": {
-                    "source": "DOSM",
-                    "dataset_id": "health_statistics_2024",
-                    "source_url": "https://open.dosm.gov.my/api/data/health_statistics_2024",
-                    "file_type": "api",
-                    "published_date": "2024-01-01T00:00:00Z",
-                    "retrieved_at": "2024-01-15T10:30:00Z",
-                    "scrape_method": "opendosm_api",
-                    "confidence": "high"
-                }
-            }
-        }
+    model_config = ConfigDict(
+        # Immutable once validated; unknown keys are errors rather than silently dropped
+        frozen=True,
+        extra="forbid",
+        json_schema_extra=openapi_example("DOSMRecordCreate")
+    )
 
 
 class DOSMRecordResponse(BaseModel):
@@ -89,10 +53,9 @@ class DOSMRecordResponse(BaseModel):
     dataset_id: str
     data: Dict[str, Any]
     record_metadata: Dict[str, Any] = Field(..., serialization_alias="metadata")
-    created_at: str
+    created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class DatasetVersionResponse(BaseModel):
@@ -104,9 +67,18 @@ class DatasetVersionResponse(BaseModel):
     version_number: int
     record_count: int
     file_size: Optional[int]
-    retrieved_at: str
-    created_at: str
+    retrieved_at: datetime
+    created_at: Optional[datetime]
+
+    @field_validator("file_hash", mode="before")
+    @classmethod
+    def encode_file_hash(cls, v):
+        if isinstance(v, (bytes, bytearray, memoryview)):
+            return bytes(v).hex()
+        return v
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(
+        from_attributes=True,
+        defer_build=True  # Response-only: build the validator/serializer on first use
+    )
 
@@ -1,10 +1,11 @@
 """
 Pydantic schemas for ETL Job API requests/responses
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 from enum import Enum
+from app.schemas._openapi import openapi_example
 
 
 class ETLJobStatus(str, Enum):
@@ -20,13 +21,7 @@ class ETLJobCreate(BaseModel):
     source: str = Field(..., max_length=100, description="Data source name (e.g., 'DHIS2', 'Legacy SQL')")
     status: Optional[ETLJobStatus] = Field(default=ETLJobStatus.PENDING, description="Job status")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "source": "DHIS2",
-                "status": "Pending"
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=openapi_example("ETLJobCreate"))
 
 
 class ETLJobResponse(BaseModel):
@@ -35,19 +30,13 @@ class ETLJobResponse(BaseModel):
     source: str
     status: ETLJobStatus
     records_processed: int = Field(..., ge=0, description="Number of records processed")
-    start_time: str
+    start_time: datetime
     errors: int = Field(..., ge=0, description="Number of errors encountered")
 
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
-            "example": {
-                "id": "1",
-                "source": "DHIS2",
-                "status": "Completed",
-                "records_processed": 1250,
-                "start_time": "2024-01-15T10:30:00Z",
-                "errors": 0
-            }
-        }
+    model_config = ConfigDict(
+        from_attributes=True,
+        coerce_numbers_to_str=True,  # Integer primary key is exposed as a string id
+        defer_build=True,  # Response-only: build the validator/serializer on first use
+        json_schema_extra=openapi_example("ETLJobResponse")
+    )
 
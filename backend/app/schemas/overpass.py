@@ -1,19 +1,18 @@
 """
 Pydantic schemas for Overpass API proxy endpoints
 """
-from typing import List, Optional, Any, Dict
-from pydantic import BaseModel, Field
+from typing import List, Optional, Any, Dict, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class OverpassQueryRequest(BaseModel):
     """Request schema for Overpass QL query"""
     query: str = Field(..., description="Overpass QL query string")
     timeout: Optional[int] = Field(25, ge=1, le=300, description="Query timeout in seconds")
-    bbox: Optional[List[float]] = Field(
+    # Fixed-length tuple: validated positionally by pydantic-core, no separate length checks
+    bbox: Optional[Tuple[float, float, float, float]] = Field(
         None,
-        description="Bounding box [south, west, north, east]",
-        min_length=4,
-        max_length=4
+        description="Bounding box [south, west, north, east]"
     )
 
 
@@ -31,6 +30,13 @@ class OverpassElement(BaseModel):
     user: Optional[str] = None
     uid: Optional[int] = None
 
+    model_config = ConfigDict(
+        # Response-only: build the validator/serializer on first use, not at import
+        defer_build=True,
+        # Immutable; extra keys are allowed since elements also carry nodes/members/geometry
+        frozen=True
+    )
+
 
 class OverpassQueryResponse(BaseModel):
     """Response schema for Overpass API query"""
@@ -40,25 +46,41 @@ class OverpassQueryResponse(BaseModel):
     elements: List[OverpassElement] = Field(default_factory=list)
     remark: Optional[str] = None
 
+    model_config = ConfigDict(
+        # Response-only: build the validator/serializer on first use, not at import
+        defer_build=True
+    )
+
+
+class LatLng(BaseModel):
+    """Facility coordinates"""
+    lat: float
+    lng: float
+
 
 class FacilityOSM(BaseModel):
     """OSM element mapped to facility format"""
     id: str
     name: str
     type: str  # "hospital" or "clinic"
-    location: Dict[str, float]  # {"lat": float, "lng": float}
+    location: LatLng
     address: str
     contact: Optional[str] = None
     lastUpdated: str
     score: int = Field(ge=0, le=100, description="Data quality score")
     osm_tags: Optional[Dict[str, str]] = None
 
+    model_config = ConfigDict(
+        # Response-only: build the validator/serializer on first use, not at import
+        defer_build=True
+    )
+
 
 class FacilitiesResponse(BaseModel):
     """Response schema for facilities endpoint"""
     facilities: List[FacilityOSM]
     count: int
-    bbox: Optional[List[float]] = None
+    bbox: Optional[Tuple[float, float, float, float]] = None
     cached: bool = False
 
 
@@ -1,9 +1,10 @@
 """
 Pydantic schemas for scraper configuration
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any
 from app.models.dosm_dataset import ScrapeTier
+from app.schemas._openapi import openapi_example
 
 
 class ScraperConfig(BaseModel):
@@ -48,20 +49,14 @@ class ScraperConfig(BaseModel):
         default=False,
         description="Enable Tier 5 browser automation (last resort)"
     )
+    catalog_cache_ttl_seconds: int = Field(
+        default=900,
+        ge=0,
+        le=86400,
+        description="How long a fetched OpenDOSM catalog is reused (0 disables caching)"
+    )
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "base_url_opendosm": "https://open.dosm.gov.my",
-                "base_url_statsdw": "https://statsdw.dosm.gov.my",
-                "base_url_main": "https://www.dosm.gov.my",
-                "rate_limit_requests_per_minute": 30,
-                "max_retries": 3,
-                "retry_backoff_factor": 2.0,
-                "request_timeout_seconds": 60,
-                "enable_browser_automation": False
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=openapi_example("ScraperConfig"))
 
 
 class DatasetDiscoveryRequest(BaseModel):
@@ -69,6 +64,7 @@ class DatasetDiscoveryRequest(BaseModel):
     category: Optional[str] = Field(None, description="Category filter (e.g., 'health', 'demographics')")
     limit: int = Field(default=100, ge=1, le=1000, description="Maximum number of datasets to discover")
     auto_assign_tiers: bool = Field(default=True, description="Automatically assign scraping tiers")
+    force: bool = Field(default=False, description="Refetch the catalog even if a cached copy is fresh")
 
 
 class ScrapeRequest(BaseModel):
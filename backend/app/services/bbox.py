@@ -0,0 +1,42 @@
+"""
+Bounding Box - Parsing and validation for "south,west,north,east" query parameters
+"""
+import re
+from typing import Tuple
+
+# "south,west,north,east": four decimal numbers, whitespace allowed around commas
+_BBOX_NUMBER = r"\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+))\s*"
+_BBOX_RE = re.compile(r"^" + ",".join([_BBOX_NUMBER] * 4) + r"$")
+
+BBox = Tuple[float, float, float, float]
+
+
+def parse_bbox(bbox: str) -> BBox:
+    """
+    Parse and validate a bounding box string
+
+    Args:
+        bbox: Bounding box as "south,west,north,east"
+
+    Returns:
+        (south, west, north, east) tuple
+
+    Raises:
+        ValueError: If the format or coordinates are invalid
+    """
+    # One regex match instead of split/strip/float per coordinate
+    match = _BBOX_RE.match(bbox)
+    if match is None:
+        raise ValueError("Bounding box must have 4 numeric coordinates")
+    south, west, north, east = map(float, match.groups())
+
+    if not (-90 <= south <= 90 and -90 <= north <= 90):
+        raise ValueError("Latitude must be between -90 and 90")
+    if not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("Longitude must be between -180 and 180")
+    if south >= north:
+        raise ValueError("South must be less than north")
+    if west >= east:
+        raise ValueError("West must be less than east")
+
+    return south, west, north, east
@@ -2,10 +2,14 @@
 DOSM Scraper - Main orchestrator
 Routes to appropriate tier scrapers, enriches with metadata, tracks versions
 """
+import asyncio
+import copy
 import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
+from app.database import SessionLocal
 from app.models.dosm_dataset import DOSMDataset, ScrapeTier
 from app.models.dosm_record import DOSMRecord
 from app.schemas.dosm_record import RecordMetadata
@@ -16,10 +20,16 @@ from app.services.scrapers.tier2_direct_download import Tier2DirectDownloadScrap
 from app.services.scrapers.tier3_pdf_extraction import Tier3PDFExtractionScraper
 from app.services.scrapers.tier4_html_parsing import Tier4HTMLParsingScraper
 from app.services.scrapers.tier5_browser_automation import Tier5BrowserAutomationScraper
-from app.config import TIER_CONFIDENCE_MAP
+from app.config import get_tier_meta
 
 logger = logging.getLogger(__name__)
 
+# Records per executemany when storing a scrape
+RECORD_INSERT_BATCH_SIZE = 1000
+
+# Datasets scraped at once by scrape_many (each holds a worker thread and a DB connection)
+DEFAULT_SCRAPE_CONCURRENCY = 5
+
 
 class DOSMScraper:
     """Main scraper orchestrator for DOSM data"""
@@ -31,9 +41,22 @@ class DOSMScraper:
         self.tier3_scraper = Tier3PDFExtractionScraper()
         self.tier4_scraper = Tier4HTMLParsingScraper()
         self.tier5_scraper = Tier5BrowserAutomationScraper()
+        # Datasets loaded up front by scrape_many, keyed by dataset_id
+        self._dataset_cache: Dict[str, DOSMDataset] = {}
+    
+    def _prefetch_datasets(self, dataset_ids: List[str]) -> None:
+        """Load the datasets of a batch with a single IN query"""
+        datasets = self.db.query(DOSMDataset).filter(
+            DOSMDataset.dataset_id.in_(set(dataset_ids))
+        ).all()
+        self._dataset_cache = {dataset.dataset_id: dataset for dataset in datasets}
     
     def _get_dataset(self, dataset_id: str) -> Optional[DOSMDataset]:
-        """Get dataset from database"""
+        """Get dataset from database (or the prefetched batch)"""
+        prefetched = self._dataset_cache.get(dataset_id)
+        if prefetched is not None:
+            # Loaded by another session: attach a copy to this one without selecting it again
+            return self.db.merge(prefetched, load=False)
         return self.db.query(DOSMDataset).filter(
             DOSMDataset.dataset_id == dataset_id
         ).first()
@@ -68,57 +91,45 @@ class DOSMScraper:
         else:
             raise ValueError(f"Unknown tier: {tier}")
     
-    def _enrich_with_metadata(
+    def _build_record_metadata(
         self,
-        records: List[Dict[str, Any]],
         dataset_id: str,
         source_url: str,
         tier: ScrapeTier,
         published_date: Optional[datetime] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> Dict[str, Any]:
         """
-        Enrich records with mandatory metadata block
+        Build the mandatory metadata block for the records of a scrape
         
         Args:
-            records: Raw records
             dataset_id: Dataset identifier
             source_url: Source URL
             tier: Scraping tier
             published_date: Optional published date
             
         Returns:
-            Records with metadata added
+            Metadata block, shared by every record of the scrape
         """
         from app.services.source_gate import get_metadata_for_tier
         
         metadata_info = get_metadata_for_tier(tier, source_url)
-        confidence = TIER_CONFIDENCE_MAP.get(tier.value, "medium")
-        
-        enriched_records = []
-        retrieved_at = datetime.utcnow()
+        confidence = get_tier_meta(tier).confidence
         
-        for record in records:
-            # Create metadata block
-            metadata = {
-                "source": "DOSM",
-                "dataset_id": dataset_id,
-                "source_url": source_url,
-                "file_type": metadata_info["file_type"],
-                "published_date": published_date.isoformat() if published_date else None,
-                "retrieved_at": retrieved_at.isoformat(),
-                "scrape_method": metadata_info["scrape_method"],
-                "confidence": confidence
-            }
-            
-            # Add metadata to record
-            enriched_record = {
-                "data": record,
-                "metadata": metadata
-            }
-            
-            enriched_records.append(enriched_record)
+        # The metadata block is the same for every record of a scrape, so it is built
+        # and validated against RecordMetadata's Literal fields once, then shared
+        metadata = {
+            "source": "DOSM",
+            "dataset_id": dataset_id,
+            "source_url": source_url,
+            "file_type": metadata_info["file_type"],
+            "published_date": published_date.isoformat() if published_date else None,
+            "retrieved_at": datetime.utcnow().isoformat(),
+            "scrape_method": metadata_info["scrape_method"],
+            "confidence": confidence
+        }
+        RecordMetadata.model_validate(metadata)
         
-        return enriched_records
+        return metadata
     
     def scrape(
         self,
@@ -174,8 +185,8 @@ class DOSMScraper:
             records, content = self._route_to_tier_scraper(tier, source_url, **scraper_kwargs)
         except Exception as e:
             logger.error(f"Scraping failed for dataset {dataset_id}: {e}")
-            # Update dataset last_checked
-            dataset.last_checked = datetime.utcnow()
+            # Update dataset last_checked (server-side timestamp, like updated_at)
+            dataset.last_checked = func.now()
             self.db.commit()
             raise
         
@@ -199,28 +210,29 @@ class DOSMScraper:
             }
         
         # Enrich with metadata
-        enriched_records = self._enrich_with_metadata(
-            records,
+        metadata = self._build_record_metadata(
             dataset_id,
             source_url,
             tier,
             published_date=None  # Could be extracted from dataset or response
         )
         
-        # Store records
-        stored_count = 0
-        for enriched_record in enriched_records:
-            db_record = DOSMRecord(
-                dataset_id=dataset_id,
-                data=enriched_record["data"],
-                record_metadata=enriched_record["metadata"]
+        # Store records with Core executemany (batched multi-row INSERTs) instead of an ORM
+        # object per record. Parameter sets are built a batch at a time and all reference
+        # the one metadata dict, so large scrapes don't hold a copy per record
+        for start in range(0, len(records), RECORD_INSERT_BATCH_SIZE):
+            self.db.execute(
+                insert(DOSMRecord.__table__),
+                [
+                    {"dataset_id": dataset_id, "data": record, "record_metadata": metadata}
+                    for record in records[start:start + RECORD_INSERT_BATCH_SIZE]
+                ]
             )
-            self.db.add(db_record)
-            stored_count += 1
+        stored_count = len(records)
         
-        # Update dataset
-        dataset.last_checked = datetime.utcnow()
-        dataset.last_successful_scrape = datetime.utcnow()
+        # Update dataset; NOW() is the transaction time, so both columns get the same value
+        dataset.last_checked = func.now()
+        dataset.last_successful_scrape = func.now()
         self.db.commit()
         
         logger.info(
@@ -236,4 +248,63 @@ class DOSMScraper:
             "tier_used": tier.value,
             "confidence": confidence
         }
-
+    
+    def _scrape_in_own_session(self, dataset_id: str, **kwargs) -> Dict[str, Any]:
+        """
+        Run scrape() on a worker thread with a dedicated database session
+        
+        Sessions aren't thread-safe; the tier scrapers only hold configuration, so the
+        worker shares them and gets its own session bound to the same engine.
+        """
+        worker = copy.copy(self)
+        worker.db = SessionLocal(bind=self.db.get_bind())
+        try:
+            return worker.scrape(dataset_id, **kwargs)
+        finally:
+            worker.db.close()
+    
+    async def scrape_many(
+        self,
+        dataset_ids: List[str],
+        concurrency: int = DEFAULT_SCRAPE_CONCURRENCY,
+        force: bool = False,
+        **scraper_kwargs
+    ) -> List[Any]:
+        """
+        Scrape several datasets concurrently
+        
+        Scrapes are I/O-bound, so up to `concurrency` of them run at once in worker
+        threads, each with its own database session. The datasets are loaded with one
+        query up front; each scrape still commits its own results, so one failing
+        dataset doesn't roll back the others.
+        
+        Args:
+            dataset_ids: Dataset identifiers
+            concurrency: Maximum number of datasets scraped at once
+            force: Force scrape even if version unchanged
+            **scraper_kwargs: Additional arguments for scrapers
+            
+        Returns:
+            One entry per dataset_id, in order: the scrape() result dictionary,
+            or the exception that scrape raised for that dataset
+        """
+        self._prefetch_datasets(dataset_ids)
+        semaphore = asyncio.BoundedSemaphore(concurrency)
+        
+        async def scrape_one(dataset_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    self._scrape_in_own_session, dataset_id, force=force, **scraper_kwargs
+                )
+        
+        try:
+            results = await asyncio.gather(
+                *(scrape_one(dataset_id) for dataset_id in dataset_ids),
+                return_exceptions=True
+            )
+        finally:
+            self._dataset_cache = {}
+        
+        failed = sum(isinstance(result, BaseException) for result in results)
+        logger.info(f"Scraped {len(dataset_ids) - failed}/{len(dataset_ids)} datasets ({failed} failed)")
+        return results
@@ -2,16 +2,80 @@
 Facility ETL Service
 Fetches healthcare facilities from Overpass API and stores them in the database
 """
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
+from sqlalchemy import case, func, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from app.models.facility import Facility
 from app.services.overpass_proxy import get_overpass_service
-from app.routes.overpass import build_healthcare_facilities_query, map_osm_to_facility, MALAYSIA_BOUNDS
+from app.services.state_mapping import (
+    get_cached_city_state_mapping,
+    get_city_state_matcher,
+    resolve_facility_state,
+)
+from app.routes.overpass import build_healthcare_facilities_query, map_osm_elements, MALAYSIA_BOUNDS
 
 logger = logging.getLogger(__name__)
 
+# Facilities per INSERT ... ON CONFLICT statement (11 parameters per row)
+UPSERT_BATCH_SIZE = 1000
+
+# Columns overwritten when a stored facility is fetched again
+_UPSERT_COLUMNS = (
+    "name", "facility_type", "latitude", "longitude", "address",
+    "contact", "quality_score", "osm_tags", "state"
+)
+
+
+def _upsert_facilities(db: Session, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Insert or update facilities by osm_id in a single statement
+    
+    Stored facilities keep their last_updated_osm unless a new one was parsed, and
+    updated_at is only bumped when a column actually changed.
+    
+    Returns:
+        (inserted, updated) counts
+    """
+    table = Facility.__table__
+    stmt = pg_insert(table).values(rows)
+    set_ = {column: stmt.excluded[column] for column in _UPSERT_COLUMNS}
+    set_["last_updated_osm"] = func.coalesce(stmt.excluded.last_updated_osm, table.c.last_updated_osm)
+    # onupdate doesn't fire for ON CONFLICT: bump updated_at only if a field actually changed
+    changed = tuple_(*(table.c[column] for column in set_)).is_distinct_from(tuple_(*set_.values()))
+    set_["updated_at"] = case((changed, func.now()), else_=table.c.updated_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.osm_id],
+        set_=set_
+    ).returning(literal_column("xmax = 0").label("inserted"))  # xmax is 0 only for freshly inserted rows
+    
+    inserted = sum(db.execute(stmt).scalars())
+    return inserted, len(rows) - inserted
+
+
+def _store_facilities(db: Session, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Upsert all fetched facilities in one transaction (blocking; run in a worker thread)
+    
+    One statement per UPSERT_BATCH_SIZE rows, but a single commit, so a failed job
+    leaves the table untouched. Rows are written in osm_id order: overlapping jobs
+    then take row locks in the same order and wait for each other instead of deadlocking.
+    
+    Returns:
+        (inserted, updated) counts
+    """
+    rows = sorted(rows, key=lambda row: row["osm_id"])
+    inserted = updated = 0
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch_inserted, batch_updated = _upsert_facilities(db, rows[start:start + UPSERT_BATCH_SIZE])
+        inserted += batch_inserted
+        updated += batch_updated
+    db.commit()
+    return inserted, updated
+
 
 async def run_facility_etl_job(
     db: Session,
@@ -39,96 +103,99 @@ async def run_facility_etl_job(
         query = build_healthcare_facilities_query(bounds)
         logger.info(f"Executing Overpass query for ETL job (bbox: {bounds})")
         
-        # Fetch from Overpass (don't use cache for ETL jobs - we want fresh data)
-        response_data = await service.execute_query(
-            query=query,
-            client_id=client_id,
-            use_cache=False
-        )
-        
-        elements = response_data.get("elements", [])
-        logger.info(f"Fetched {len(elements)} elements from Overpass API")
-        
         # Process and store facilities
         stored_count = 0
         updated_count = 0
         error_count = 0
+        element_count = 0
         
-        for element in elements:
-            try:
-                facility_osm = map_osm_to_facility(element)
-                if not facility_osm:
-                    continue
-                
-                # Check if facility exists by OSM ID
-                existing = db.query(Facility).filter(
-                    Facility.osm_id == facility_osm.id
-                ).first()
-                
-                # Parse last_updated_osm if available
-                last_updated_osm = None
-                if facility_osm.lastUpdated:
-                    try:
-                        # Try to parse ISO format timestamp
-                        last_updated_osm = datetime.fromisoformat(facility_osm.lastUpdated.replace('Z', '+00:00'))
-                    except (ValueError, AttributeError):
-                        pass
-                
-                if existing:
-                    # Update existing facility
-                    existing.name = facility_osm.name
-                    existing.facility_type = facility_osm.type
-                    existing.latitude = facility_osm.location["lat"]
-                    existing.longitude = facility_osm.location["lng"]
-                    existing.address = facility_osm.address
-                    existing.contact = facility_osm.contact
-                    existing.quality_score = facility_osm.score
-                    existing.osm_tags = facility_osm.osm_tags
-                    if last_updated_osm:
-                        existing.last_updated_osm = last_updated_osm
-                    updated_count += 1
-                else:
-                    # Create new facility
-                    new_facility = Facility(
-                        osm_id=facility_osm.id,
-                        name=facility_osm.name,
-                        facility_type=facility_osm.type,
-                        latitude=facility_osm.location["lat"],
-                        longitude=facility_osm.location["lng"],
-                        address=facility_osm.address,
-                        contact=facility_osm.contact,
-                        quality_score=facility_osm.score,
-                        osm_tags=facility_osm.osm_tags,
-                        last_updated_osm=last_updated_osm
+        # State is resolved once here so read endpoints can group by the stored column
+        # (a cache miss rebuilds the mapping from the DOSM records, so it runs in a thread)
+        match_city_state = get_city_state_matcher(
+            await asyncio.to_thread(get_cached_city_state_mapping, db)
+        )
+        
+        def to_rows(elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            """Map a batch of OSM elements to facility rows (runs in a worker thread)"""
+            nonlocal error_count, element_count
+            element_count += len(elements)
+            # Plain dicts: no per-element model validation on this bulk path
+            rows = []
+            for facility_osm in map_osm_elements(elements):
+                try:
+                    # Parse last_updated_osm if available
+                    last_updated_osm = None
+                    if facility_osm["lastUpdated"]:
+                        try:
+                            # Try to parse ISO format timestamp
+                            last_updated_osm = datetime.fromisoformat(facility_osm["lastUpdated"].replace('Z', '+00:00'))
+                        except (ValueError, AttributeError):
+                            pass
+                    
+                    state = resolve_facility_state(
+                        facility_osm["osm_tags"],
+                        facility_osm["address"],
+                        facility_osm["location"]["lat"],
+                        facility_osm["location"]["lng"],
+                        match_city_state
                     )
-                    db.add(new_facility)
-                    stored_count += 1
                     
-            except Exception as e:
-                error_count += 1
-                logger.warning(f"Error processing facility element: {e}")
-                continue
+                    rows.append({
+                        "osm_id": facility_osm["id"],
+                        "name": facility_osm["name"],
+                        "facility_type": facility_osm["type"],
+                        "latitude": facility_osm["location"]["lat"],
+                        "longitude": facility_osm["location"]["lng"],
+                        "address": facility_osm["address"],
+                        "contact": facility_osm["contact"],
+                        "quality_score": facility_osm["score"],
+                        "osm_tags": facility_osm["osm_tags"],
+                        "state": state,
+                        "last_updated_osm": last_updated_osm
+                    })
+                        
+                except Exception as e:
+                    error_count += 1
+                    logger.warning(f"Error processing facility element: {e}")
+                    continue
+            return rows
+        
+        # Elements are parsed and mapped while the response streams in (don't use cache
+        # for ETL jobs - we want fresh data), so neither the body nor the parsed element
+        # list is held in memory; only the compact facility rows are kept.
+        # An element listed twice is only written once (an upsert can't touch a row twice)
+        seen_ids = set()
+        pending: List[Dict[str, Any]] = []
+        async for rows in service.iter_mapped_query(query=query, mapper=to_rows, client_id=client_id):
+            for row in rows:
+                if row["osm_id"] not in seen_ids:
+                    seen_ids.add(row["osm_id"])
+                    pending.append(row)
+        logger.info(f"Fetched {element_count} elements from Overpass API")
         
-        # Commit all changes
-        db.commit()
+        # Insert or update in batches (one round trip per UPSERT_BATCH_SIZE facilities
+        # instead of a SELECT plus INSERT/UPDATE per facility) once the download is done,
+        # so no transaction stays open while Overpass streams and no partial update is kept
+        if pending:
+            stored_count, updated_count = await asyncio.to_thread(_store_facilities, db, pending)
         
         result = {
             "stored": stored_count,
             "updated": updated_count,
-            "total": len(elements),
+            "total": element_count,
             "errors": error_count,
             "bbox": bounds
         }
         
         logger.info(
             f"ETL job completed: stored={stored_count}, updated={updated_count}, "
-            f"errors={error_count}, total={len(elements)}"
+            f"errors={error_count}, total={element_count}"
         )
         
         return result
         
     except Exception as e:
         logger.error(f"Error in facility ETL job: {e}")
-        db.rollback()
+        await asyncio.to_thread(db.rollback)
         raise
 
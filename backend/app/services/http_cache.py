@@ -0,0 +1,80 @@
+"""
+HTTP Cache - ETag validation for read-only GET endpoints
+The ETag is a version derived from the facilities table (latest change and row
+count) instead of a hash of the (potentially large) response body
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.facility import Facility
+
+# Clients may keep the response but must revalidate it before reuse
+CACHE_CONTROL = "private, must-revalidate"
+
+
+def get_facility_data_version(db: Session) -> str:
+    """
+    Get a version string that changes whenever the facilities table does
+
+    The latest updated_at covers inserts and updates from any writer (ETL jobs,
+    backfills, manual fixes); the row count covers deletes. Other tables (e.g. DOSM
+    jobs completing) don't affect it.
+    """
+    latest, count = db.execute(select(func.max(Facility.updated_at), func.count()).select_from(Facility)).one()
+    return f"{latest.strftime('%Y%m%d%H%M%S%f')}.{count}" if latest else "0"
+
+
+def make_etag(namespace: str, version: str) -> str:
+    """Build a weak ETag for a resource family at a data version"""
+    return f'W/"{namespace}-{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison, as RFC 9110 requires for GET)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """Response headers for a validated resource"""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def not_modified_since(request: Request, last_modified: datetime) -> bool:
+    """
+    Check If-Modified-Since against a last-modified time
+
+    Ignored when If-None-Match is present (RFC 9110 gives the ETag precedence) or unparseable.
+    """
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or "if-none-match" in request.headers:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second precision
+    return last_modified.replace(microsecond=0) <= since
+
+
+def not_modified_response(request: Request, etag: str) -> Optional[Response]:
+    """Return a bodiless 304 response if the client already has this version, else None"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
@@ -2,12 +2,28 @@
 Overpass API proxy service with caching and rate limiting
 """
 import os
+import re
+import asyncio
 import hashlib
 import logging
-from typing import Optional, Dict, Any, List
+import secrets
+import time
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator
 from datetime import datetime, timedelta
 from functools import lru_cache
 import httpx
+import orjson
+from cachetools import TTLCache
+try:
+    import ijson
+except ImportError:
+    # Optional: without it, mapped queries buffer and parse the whole response
+    ijson = None
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    # Optional: without it, cache and rate-limit state are per process even if REDIS_URL is set
+    aioredis = None
 try:
     from app.config import get_overpass_config
 except ImportError:
@@ -21,12 +37,69 @@ except ImportError:
         return {
             "url": base_url.rstrip("/"),
             "cache_ttl": int(os.getenv("OVERPASS_CACHE_TTL", "300")),
+            "cache_max_entries": int(os.getenv("OVERPASS_CACHE_MAX", "512")),
+            "redis_url": os.getenv("REDIS_URL") or None,
             "rate_limit": int(os.getenv("OVERPASS_RATE_LIMIT", "60")),
-            "timeout": int(os.getenv("OVERPASS_TIMEOUT", "60"))
+            "timeout": int(os.getenv("OVERPASS_TIMEOUT", "60")),
+            "max_connections": int(os.getenv("OVERPASS_MAX_CONNECTIONS", "20")),
+            "max_keepalive_connections": int(os.getenv("OVERPASS_MAX_KEEPALIVE_CONNECTIONS", "10")),
+            "keepalive_expiry": float(os.getenv("OVERPASS_KEEPALIVE_EXPIRY", "75")),
+            "http2": os.getenv("OVERPASS_HTTP2", "1") == "1"
         }
 
 logger = logging.getLogger(__name__)
 
+# Streamed elements are mapped in worker threads, this many at a time, so the
+# CPU-bound mapping doesn't block the event loop (or pay a thread hop per chunk)
+MAP_BATCH_SIZE = 500
+
+# Redis key prefixes for the shared response cache and per-client rate-limit windows
+REDIS_CACHE_PREFIX = "hp:ovp:cache:"
+REDIS_RATE_LIMIT_PREFIX = "hp:ovp:rl:"
+
+
+def _accept_encoding() -> str:
+    """Compressed encodings to request; OSM JSON compresses well and httpx decodes br only with brotli"""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return "gzip, deflate"
+    return "gzip, deflate, br"
+
+
+# Message of an Overpass runtime error page
+_ERROR_MESSAGE_RE = re.compile(r'<strong[^>]*>Error</strong>:\s*([^<]+)', re.IGNORECASE)
+
+
+def _is_html(body_start: bytes, body: bytes, content_type: str = "") -> bool:
+    """
+    Whether a response is an HTML/XML error page; JSON is recognised from its first bytes
+    
+    The whole body is only searched for <body> when the Content-Type says it is markup.
+    """
+    body_start = body_start.lstrip()
+    if not body_start or body_start.startswith(b"{"):
+        return False
+    if body_start.startswith((b"<?xml", b"<html")):
+        return True
+    return ("html" in content_type or "xml" in content_type) and b"<body>" in body.lower()
+
+
+def _html_error_message(text: str) -> str:
+    """Explain an HTML error page returned by Overpass instead of JSON"""
+    text_lower = text.lower()
+    if 'rate limit' in text_lower or '429' in text:
+        return "Overpass API rate limit exceeded. Please try again later."
+    if 'duplicate_query' in text_lower:
+        return "Overpass API detected a duplicate query. This can happen when the same query is sent too quickly. Please wait a moment and try again."
+    if 'runtime error' in text_lower:
+        # Extract the actual error message from HTML
+        error_match = _ERROR_MESSAGE_RE.search(text)
+        if error_match:
+            return f"Overpass API error: {error_match.group(1).strip()}"
+        return "Overpass API returned a runtime error. The query may be too complex or the server may be overloaded."
+    return "Overpass API returned HTML instead of JSON. This usually indicates a rate limit or server error."
+
 
 class OverpassProxyService:
     """Service for proxying Overpass API queries with caching and rate limiting"""
@@ -41,17 +114,61 @@ class OverpassProxyService:
         self.base_url = base_url
         self.client = httpx.AsyncClient(
             timeout=httpx.Timeout(self.config["timeout"], connect=10.0),
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
+            limits=httpx.Limits(
+                max_connections=self.config["max_connections"],
+                max_keepalive_connections=self.config["max_keepalive_connections"],
+                keepalive_expiry=self.config["keepalive_expiry"]
+            ),
+            http2=self._http2_enabled(),
+            headers={"Accept-Encoding": _accept_encoding()}
+        )
+        # Parsed responses, and raw bodies under "raw:" keys; entries expire after cache_ttl
+        # and the least recently used are evicted once cache_max_entries is reached
+        self._cache: TTLCache = TTLCache(
+            maxsize=self.config["cache_max_entries"],
+            ttl=self.config["cache_ttl"]
         )
-        self._cache: Dict[str, Dict[str, Any]] = {}
         self._rate_limit_tracker: Dict[str, List[datetime]] = {}
+        # With REDIS_URL set, cache entries and rate-limit windows are shared by all workers
+        self._redis = self._redis_client()
+    
+    def _redis_client(self) -> Optional[Any]:
+        """Client for the shared cache/rate-limit store, or None to keep state in process"""
+        if not self.config["redis_url"]:
+            return None
+        if aioredis is None:
+            logger.warning("REDIS_URL is set but redis is not installed (pip install redis); using per-process cache")
+            return None
+        return aioredis.Redis.from_url(self.config["redis_url"])
+    
+    def _http2_enabled(self) -> bool:
+        """Whether to negotiate HTTP/2 (requires the optional h2 package)"""
+        if not self.config["http2"]:
+            return False
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 enabled but h2 is not installed (pip install 'httpx[http2]'); using HTTP/1.1")
+            return False
+        return True
     
     def _get_cache_key(self, query: str) -> str:
-        """Generate cache key from query string"""
+        """
+        Generate cache key from query string
+        
+        SHA-256 uses the CPU's SHA extensions where available (faster than blake2b/md5);
+        keys are shared via Redis, so every worker must hash the same way.
+        """
         return hashlib.sha256(query.encode()).hexdigest()
     
-    def _is_rate_limited(self, client_id: str) -> bool:
-        """Check if client has exceeded rate limit"""
+    async def _is_rate_limited(self, client_id: str) -> bool:
+        """Check if client has exceeded rate limit (shared across workers when Redis is configured)"""
+        if self._redis is not None:
+            try:
+                return await self._is_rate_limited_shared(client_id)
+            except aioredis.RedisError as e:
+                logger.warning(f"Redis rate limit check failed, using per-process limit: {e}")
+        
         now = datetime.now()
         if client_id not in self._rate_limit_tracker:
             self._rate_limit_tracker[client_id] = []
@@ -70,27 +187,53 @@ class OverpassProxyService:
         self._rate_limit_tracker[client_id].append(now)
         return False
     
-    def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Get cached response if available and not expired"""
-        if cache_key not in self._cache:
-            return None
+    async def _is_rate_limited_shared(self, client_id: str) -> bool:
+        """
+        Sliding one-minute window in a Redis sorted set (member per request, scored by time)
         
-        cached = self._cache[cache_key]
-        age = datetime.now() - cached["timestamp"]
+        The request is recorded before counting so concurrent workers can't both take
+        the last slot; a rejected request is removed again so it doesn't use up budget.
+        """
+        key = REDIS_RATE_LIMIT_PREFIX + client_id
+        now = time.time()
+        member = f"{now}:{secrets.token_hex(4)}"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, 0, now - 60)
+            pipe.zadd(key, {member: now})
+            pipe.zcard(key)
+            pipe.expire(key, 60)
+            _, _, count, _ = await pipe.execute()
         
-        if age.total_seconds() > self.config["cache_ttl"]:
-            # Cache expired, remove it
-            del self._cache[cache_key]
+        if count > self.config["rate_limit"]:
+            await self._redis.zrem(key, member)
+            return True
+        return False
+    
+    async def _get_cached(self, cache_key: str) -> Optional[Any]:
+        """Get a cached response: parsed JSON, or body bytes for "raw:" keys"""
+        if self._redis is None:
+            return self._cache.get(cache_key)
+        try:
+            value = await self._redis.get(REDIS_CACHE_PREFIX + cache_key)
+        except aioredis.RedisError as e:
+            logger.warning(f"Redis cache read failed: {e}")
             return None
-        
-        return cached["data"]
+        if value is None or cache_key.startswith("raw:"):
+            return value
+        return orjson.loads(value)
     
-    def _set_cached_response(self, cache_key: str, data: Dict[str, Any]) -> None:
-        """Store response in cache"""
-        self._cache[cache_key] = {
-            "data": data,
-            "timestamp": datetime.now()
-        }
+    async def _set_cached(self, cache_key: str, data: Any) -> None:
+        """Store a response; Redis expires it after cache_ttl like the in-process cache"""
+        if self._redis is None:
+            self._cache[cache_key] = data
+            return
+        if self.config["cache_ttl"] <= 0:
+            return
+        value = data if cache_key.startswith("raw:") else orjson.dumps(data)
+        try:
+            await self._redis.set(REDIS_CACHE_PREFIX + cache_key, value, ex=self.config["cache_ttl"])
+        except aioredis.RedisError as e:
+            logger.warning(f"Redis cache write failed: {e}")
     
     async def execute_query(
         self,
@@ -114,20 +257,89 @@ class OverpassProxyService:
             ValueError: If rate limited
         """
         # Check rate limit
-        if self._is_rate_limited(client_id):
+        if await self._is_rate_limited(client_id):
             raise ValueError(
                 f"Rate limit exceeded. Maximum {self.config['rate_limit']} queries per minute."
             )
         
-        # Check cache
-        if use_cache:
-            cache_key = self._get_cache_key(query)
-            cached = self._get_cached_response(cache_key)
+        # Check cache (the key is computed once and reused to store the response)
+        cache_key = self._get_cache_key(query) if use_cache else None
+        if cache_key:
+            cached = await self._get_cached(cache_key)
             if cached is not None:
                 logger.info(f"Cache hit for query: {cache_key[:16]}...")
                 return cached
         
-        # Execute query
+        content = await self._fetch_json_bytes(query=query, client_id=client_id)
+        try:
+            # orjson parses coordinate-heavy OSM payloads several times faster than json
+            data = orjson.loads(content)
+        except Exception as e:
+            logger.error(f"Unexpected error executing Overpass query: {e}")
+            raise
+        
+        # Cache successful responses
+        if cache_key:
+            await self._set_cached(cache_key, data)
+        
+        return data
+    
+    async def execute_raw_query(
+        self,
+        query: str,
+        client_id: str = "default",
+        use_cache: bool = True
+    ) -> bytes:
+        """
+        Execute Overpass QL query, returning the JSON body exactly as Overpass sent it
+        
+        For passthrough endpoints: the body is never parsed or re-serialized. Raw
+        bodies are cached separately from execute_query's parsed responses.
+        
+        Args:
+            query: Overpass QL query string
+            client_id: Client identifier for rate limiting
+            use_cache: Whether to use cache for this query
+        
+        Returns:
+            Overpass API response body (JSON bytes)
+        
+        Raises:
+            httpx.HTTPError: If request fails or the body is not JSON
+            ValueError: If rate limited
+        """
+        # Check rate limit
+        if await self._is_rate_limited(client_id):
+            raise ValueError(
+                f"Rate limit exceeded. Maximum {self.config['rate_limit']} queries per minute."
+            )
+        
+        cache_key = "raw:" + self._get_cache_key(query)
+        if use_cache:
+            cached = await self._get_cached(cache_key)
+            if cached is not None:
+                logger.info(f"Cache hit for raw query: {cache_key[4:20]}...")
+                return cached
+        
+        content = await self._fetch_json_bytes(query=query, client_id=client_id)
+        # Only the first bytes are checked: e.g. [out:xml] queries can't be served as JSON
+        if content[:64].lstrip()[:1] not in (b"{", b"["):
+            raise httpx.DecodingError(
+                "Overpass API returned a non-JSON response (queries must use [out:json])"
+            )
+        
+        if use_cache:
+            await self._set_cached(cache_key, content)
+        
+        return content
+    
+    async def _fetch_json_bytes(self, query: str, client_id: str) -> bytes:
+        """
+        POST a query to the interpreter and return the response body
+        
+        Raises:
+            httpx.HTTPError: If request fails or Overpass returns an HTML error page
+        """
         try:
             logger.info(f"Executing Overpass query (client: {client_id})")
             response = await self.client.post(
@@ -137,38 +349,12 @@ class OverpassProxyService:
             )
             response.raise_for_status()
             
-            # Check if response is HTML (error page) instead of JSON
-            if response.text and (response.text.strip().startswith('<?xml') or response.text.strip().startswith('<html') or '<body>' in response.text.lower()):
-                error_msg = "Overpass API returned HTML instead of JSON. This usually indicates a rate limit or server error."
-                response_lower = response.text.lower()
-                if 'rate limit' in response_lower or '429' in response.text:
-                    error_msg = "Overpass API rate limit exceeded. Please try again later."
-                elif 'duplicate_query' in response_lower:
-                    error_msg = "Overpass API detected a duplicate query. This can happen when the same query is sent too quickly. Please wait a moment and try again."
-                elif 'runtime error' in response_lower:
-                    # Extract the actual error message from HTML
-                    import re
-                    error_match = re.search(r'<strong[^>]*>Error</strong>:\s*([^<]+)', response.text, re.IGNORECASE)
-                    if error_match:
-                        error_msg = f"Overpass API error: {error_match.group(1).strip()}"
-                    else:
-                        error_msg = "Overpass API returned a runtime error. The query may be too complex or the server may be overloaded."
-                response_preview = response.text[:200] if response.text else ""
-                logger.error(f"{error_msg} Response preview: {response_preview}")
-                raise httpx.HTTPStatusError(
-                    error_msg,
-                    request=response.request,
-                    response=response
-                )
-            
-            data = response.json()
+            # Check if response is HTML (error page) instead of JSON; JSON bodies are
+            # recognised from their first bytes, so large payloads are never lowercased
+            if _is_html(response.content[:64], response.content, response.headers.get("content-type", "")):
+                self._raise_html_error(response)
             
-            # Cache successful responses
-            if use_cache:
-                cache_key = self._get_cache_key(query)
-                self._set_cached_response(cache_key, data)
-            
-            return data
+            return response.content
         
         except httpx.HTTPStatusError as e:
             status_code = e.response.status_code
@@ -186,6 +372,132 @@ class OverpassProxyService:
             logger.error(f"Unexpected error executing Overpass query: {e}")
             raise
     
+    def _raise_html_error(self, response: httpx.Response) -> None:
+        """Log and raise an HTML error page as an HTTPStatusError"""
+        error_msg = _html_error_message(response.text)
+        response_preview = response.text[:200] if response.text else ""
+        logger.error(f"{error_msg} Response preview: {response_preview}")
+        raise httpx.HTTPStatusError(
+            error_msg,
+            request=response.request,
+            response=response
+        )
+    
+    async def execute_mapped_query(
+        self,
+        query: str,
+        mapper: Callable[[List[Dict[str, Any]]], List[Any]],
+        client_id: str = "default"
+    ) -> List[Any]:
+        """
+        Execute Overpass QL query, mapping its elements while the response streams in
+        
+        Results aren't cached here; callers cache the mapped output.
+        
+        Args:
+            query: Overpass QL query string
+            mapper: Maps a batch of OSM elements to output items
+            client_id: Client identifier for rate limiting
+        
+        Returns:
+            Concatenated mapper output
+        
+        Raises:
+            httpx.HTTPError: If request fails
+            ValueError: If rate limited
+        """
+        results: List[Any] = []
+        async for batch in self.iter_mapped_query(query=query, mapper=mapper, client_id=client_id):
+            results.extend(batch)
+        return results
+    
+    async def iter_mapped_query(
+        self,
+        query: str,
+        mapper: Callable[[List[Dict[str, Any]]], List[Any]],
+        client_id: str = "default"
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Execute Overpass QL query, yielding mapped batches of elements as the response streams in
+        
+        Elements are parsed incrementally with ijson and passed to mapper in batches, so
+        mapping overlaps the download and the full body and parsed document are never
+        held at once. mapper runs in a worker thread to keep the event loop responsive.
+        Without ijson this falls back to execute_query and yields a single batch.
+        
+        Args:
+            query: Overpass QL query string
+            mapper: Maps a batch of OSM elements to output items
+            client_id: Client identifier for rate limiting
+        
+        Yields:
+            mapper output for each batch of elements
+        
+        Raises:
+            httpx.HTTPError: If request fails
+            ValueError: If rate limited
+        """
+        if ijson is None:
+            data = await self.execute_query(query=query, client_id=client_id, use_cache=False)
+            yield await asyncio.to_thread(mapper, data.get("elements", []))
+            return
+        
+        if await self._is_rate_limited(client_id):
+            raise ValueError(
+                f"Rate limit exceeded. Maximum {self.config['rate_limit']} queries per minute."
+            )
+        
+        try:
+            logger.info(f"Executing streamed Overpass query (client: {client_id})")
+            async with self.client.stream(
+                "POST",
+                f"{self.base_url}/api/interpreter",
+                content=query,
+                headers={"Content-Type": "text/plain"}
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                
+                elements = ijson.sendable_list()
+                parser = None
+                chunks = response.aiter_bytes()
+                async for chunk in chunks:
+                    if parser is None:
+                        # Error pages are small; buffer them and raise as the buffered path does
+                        if _is_html(chunk[:64], chunk, response.headers.get("content-type", "")):
+                            body = chunk + b"".join([rest async for rest in chunks])
+                            self._raise_html_error(httpx.Response(
+                                response.status_code,
+                                content=body,
+                                request=response.request
+                            ))
+                        parser = ijson.items_coro(elements, "elements.item", use_float=True)
+                    parser.send(chunk)
+                    if len(elements) >= MAP_BATCH_SIZE:
+                        batch = await asyncio.to_thread(mapper, elements)
+                        del elements[:]
+                        yield batch
+                if parser is not None:
+                    parser.close()
+                if elements:
+                    yield await asyncio.to_thread(mapper, elements)
+        
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            response_text = e.response.text[:200] if e.response.text else ""
+            logger.error(f"Overpass API HTTP error: {status_code} - {response_text}")
+            if status_code == 504:
+                error_msg = f"Overpass API timeout: The server is too busy. {response_text}"
+                raise httpx.HTTPStatusError(error_msg, request=e.request, response=e.response)
+            raise
+        except httpx.RequestError as e:
+            logger.error(f"Overpass API request error: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error executing streamed Overpass query: {e}")
+            raise
+    
     async def check_health(self) -> Dict[str, Any]:
         """Check Overpass API health status"""
         try:
@@ -212,12 +524,18 @@ class OverpassProxyService:
         """Clear all cached responses. Returns number of entries cleared."""
         count = len(self._cache)
         self._cache.clear()
+        if self._redis is not None:
+            keys = [key async for key in self._redis.scan_iter(match=REDIS_CACHE_PREFIX + "*")]
+            if keys:
+                count += await self._redis.delete(*keys)
         logger.info(f"Cleared {count} cached responses")
         return count
     
     async def close(self):
-        """Close HTTP client"""
+        """Close HTTP client (and the Redis connection pool, if any)"""
         await self.client.aclose()
+        if self._redis is not None:
+            await self._redis.aclose()
 
 
 # Global service instance
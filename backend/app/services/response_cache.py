@@ -0,0 +1,211 @@
+"""
+Response Cache - In-process TTL cache for read-heavy GET endpoints
+Entries are grouped by namespace so write endpoints can invalidate them. With
+REDIS_URL set, invalidations are shared through Redis so every worker sees them.
+"""
+import asyncio
+import inspect
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Hashable, Optional, Tuple
+from cachetools import TTLCache
+from sqlalchemy.orm import Session
+try:
+    import redis
+except ImportError:
+    # Optional: without it, invalidations only reach the worker that made the write
+    redis = None
+from app.config import get_response_cache_config
+
+logger = logging.getLogger(__name__)
+
+# Sentinel so cached None values are distinguishable from misses
+_MISS = object()
+
+# Redis key prefix for per-namespace generation counters
+REDIS_GENERATION_PREFIX = "hp:rc:gen:"
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL cache keyed by (namespace, params)
+
+    Values stay in process (they may be ORM rows). With a Redis URL, each namespace
+    has a generation counter in Redis that is part of every stored key: invalidate()
+    bumps it, so entries cached by other workers stop matching. Workers keep their copy
+    of a generation for generation_ttl seconds, so cache hits don't wait on Redis.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl_seconds: int = 300,
+        redis_url: Optional[str] = None,
+        generation_ttl: float = 1.0
+    ):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self._redis = self._redis_client(redis_url)
+        self._generations: Optional[TTLCache] = (
+            TTLCache(maxsize=256, ttl=generation_ttl) if generation_ttl > 0 else None
+        )
+
+    def _redis_client(self, redis_url: Optional[str]) -> Optional[Any]:
+        """Client for the shared generation counters, or None to invalidate in process only"""
+        if not redis_url:
+            return None
+        if redis is None:
+            logger.warning("A response cache Redis URL is set but redis is not installed (pip install redis); "
+                           "response cache invalidation is per process")
+            return None
+        return redis.Redis.from_url(redis_url)
+
+    def _with_generation(self, key: Tuple[Hashable, ...], generation: int) -> Tuple[Hashable, ...]:
+        return (key[0], generation) + key[1:]
+
+    def _local_storage_key(self, key: Tuple[Hashable, ...]) -> Any:
+        """Storage key if it can be built without Redis, else the _MISS sentinel"""
+        if self._redis is None:
+            return key
+        if self._generations is None:
+            return _MISS
+        with self._lock:
+            generation = self._generations.get(key[0])
+        return _MISS if generation is None else self._with_generation(key, generation)
+
+    def _storage_key(self, key: Tuple[Hashable, ...]) -> Optional[Tuple[Hashable, ...]]:
+        """
+        Key including the namespace's current generation, or None to bypass the cache
+
+        Blocking when the generation has to be read from Redis; async callers run it in a thread.
+        """
+        storage_key = self._local_storage_key(key)
+        if storage_key is not _MISS:
+            return storage_key
+        try:
+            generation = int(self._redis.get(REDIS_GENERATION_PREFIX + str(key[0])) or 0)
+        except redis.RedisError as e:
+            # Without the counter another worker's invalidation could be missed
+            logger.warning(f"Redis response cache generation read failed: {e}")
+            return None
+        self._remember_generation(key[0], generation)
+        return self._with_generation(key, generation)
+
+    def _remember_generation(self, namespace: Hashable, generation: int) -> None:
+        if self._generations is not None:
+            with self._lock:
+                self._generations[namespace] = generation
+
+    def _get_stored(self, storage_key: Optional[Tuple[Hashable, ...]]) -> Any:
+        if storage_key is None:
+            return _MISS
+        with self._lock:
+            return self._cache.get(storage_key, _MISS)
+
+    def _set_stored(self, storage_key: Optional[Tuple[Hashable, ...]], value: Any) -> None:
+        if storage_key is None:
+            return
+        with self._lock:
+            self._cache[storage_key] = value
+
+    def get(self, key: Tuple[Hashable, ...]) -> Any:
+        """Get cached value, or the _MISS sentinel"""
+        return self._get_stored(self._storage_key(key))
+
+    def set(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        """Store value in cache"""
+        self._set_stored(self._storage_key(key), value)
+
+    def get_or_compute(self, key: Tuple[Hashable, ...], compute: Callable[[], Any]) -> Any:
+        """Get cached value, computing and storing it on a miss"""
+        # The value is stored under the generation read before computing it, so an
+        # invalidation that lands mid-compute isn't masked
+        storage_key = self._storage_key(key)
+        value = self._get_stored(storage_key)
+        if value is _MISS:
+            value = compute()
+            self._set_stored(storage_key, value)
+        return value
+
+    def invalidate(self, namespace: str) -> int:
+        """
+        Remove all entries in a namespace. Returns number of entries removed.
+
+        Blocking when shared through Redis; async callers run it in a thread.
+        """
+        with self._lock:
+            keys = [key for key in self._cache.keys() if key[0] == namespace]
+            for key in keys:
+                self._cache.pop(key, None)
+        if self._redis is not None:
+            try:
+                # This worker sees its own write at once; others within generation_ttl
+                self._remember_generation(namespace, self._redis.incr(REDIS_GENERATION_PREFIX + namespace))
+            except redis.RedisError as e:
+                logger.warning(f"Redis response cache invalidation failed for '{namespace}': {e}")
+        if keys:
+            logger.debug(f"Invalidated {len(keys)} cached responses in namespace '{namespace}'")
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._cache.clear()
+
+
+def _create_response_cache() -> ResponseCache:
+    config = get_response_cache_config()
+    return ResponseCache(
+        maxsize=config["max_entries"],
+        ttl_seconds=config["ttl"],
+        redis_url=config["redis_url"],
+        generation_ttl=config["generation_ttl"]
+    )
+
+
+# Global cache instance
+response_cache = _create_response_cache()
+
+
+def _build_key(namespace: str, kwargs: dict) -> Tuple[Hashable, ...]:
+    """Build a cache key from endpoint keyword arguments, skipping DB sessions"""
+    params = tuple(sorted(
+        (name, value) for name, value in kwargs.items()
+        if not isinstance(value, Session)
+    ))
+    return (namespace, params)
+
+
+def cache_response(namespace: str, cache: Optional[ResponseCache] = None) -> Callable:
+    """
+    Cache an endpoint's return value by namespace and query/path parameters
+
+    Works with both sync and async endpoints. Exceptions (e.g. 404s) are not cached.
+    Call ``response_cache.invalidate(namespace)`` after writes.
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(**kwargs):
+                store = cache or response_cache
+                key = _build_key(namespace, kwargs)
+                storage_key = store._local_storage_key(key)
+                if storage_key is _MISS:
+                    # The generation has to come from Redis: don't block the event loop
+                    storage_key = await asyncio.to_thread(store._storage_key, key)
+                cached = store._get_stored(storage_key)
+                if cached is not _MISS:
+                    return cached
+                result = await func(**kwargs)
+                store._set_stored(storage_key, result)
+                return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(**kwargs):
+            store = cache or response_cache
+            return store.get_or_compute(_build_key(namespace, kwargs), lambda: func(**kwargs))
+        return wrapper
+
+    return decorator
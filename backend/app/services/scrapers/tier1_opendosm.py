@@ -5,14 +5,19 @@ Highest confidence, preferred method
 import logging
 import requests
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
+from pydantic import TypeAdapter
 from tenacity import retry, stop_after_attempt, wait_exponential
 from app.config import scraper_config
 from app.services.source_gate import is_official_dosm_domain
 
 logger = logging.getLogger(__name__)
 
+# API payloads are a list of records or an object wrapping them. Built once: the body
+# is parsed and checked in a single pydantic-core pass straight from the raw bytes
+_API_PAYLOAD_ADAPTER = TypeAdapter(Union[List[Any], Dict[str, Any]])
+
 
 class Tier1OpenDOSMScraper:
     """Scraper for OpenDOSM API and direct data file downloads"""
@@ -64,13 +69,13 @@ class Tier1OpenDOSMScraper:
             logger.info(f"Scraping OpenDOSM API: {api_url}")
             response = self._make_request(api_url)
             
-            # Try to parse as JSON
-            data = response.json()
+            # Try to parse as JSON (raises ValidationError, a ValueError, for scalar payloads)
+            data = _API_PAYLOAD_ADAPTER.validate_json(response.content)
             
             # Handle different API response formats
             if isinstance(data, list):
                 records = data
-            elif isinstance(data, dict):
+            else:
                 # Common patterns: data, results, records, items
                 records = (
                     data.get("data") or
@@ -79,8 +84,6 @@ class Tier1OpenDOSMScraper:
                     data.get("items") or
                     [data]  # Single record
                 )
-            else:
-                raise ValueError(f"Unexpected API response format: {type(data)}")
             
             logger.info(f"Retrieved {len(records)} records from OpenDOSM API")
             return records
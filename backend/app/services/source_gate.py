@@ -3,9 +3,10 @@ Source Gate - Validates and gates data sources for safety
 Prioritizes official DOSM domains and blocks unsafe sources
 """
 import logging
+from functools import lru_cache
 from urllib.parse import urlparse
 from typing import Optional, Tuple
-from app.config import DOSM_OFFICIAL_DOMAINS, TIER_CONFIDENCE_MAP, TIER_FILE_TYPE_MAP, TIER_SCRAPE_METHOD_MAP
+from app.config import DOSM_OFFICIAL_DOMAINS_SET, DOSM_OFFICIAL_DOMAIN_RE, get_tier_meta
 from app.models.dosm_dataset import ScrapeTier
 
 logger = logging.getLogger(__name__)
@@ -27,19 +28,13 @@ def is_official_dosm_domain(url: str) -> bool:
         True if URL is from official DOSM domain
     """
     try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
+        # hostname is lowercased with port and credentials stripped
+        domain = urlparse(url).hostname
+        if not domain:
+            return False
         
-        # Remove port if present
-        if ':' in domain:
-            domain = domain.split(':')[0]
-        
-        # Check against whitelist
-        for official_domain in DOSM_OFFICIAL_DOMAINS:
-            if domain == official_domain or domain.endswith('.' + official_domain):
-                return True
-        
-        return False
+        # Check against whitelist (exact match, then subdomain suffix)
+        return domain in DOSM_OFFICIAL_DOMAINS_SET or DOSM_OFFICIAL_DOMAIN_RE.search(domain) is not None
     except Exception as e:
         logger.warning(f"Error parsing URL {url}: {e}")
         return False
@@ -69,7 +64,7 @@ def resolve_source(dataset_id: str, source_url: Optional[str] = None) -> Tuple[s
         
         # Determine tier based on URL pattern
         tier = _determine_tier_from_url(source_url)
-        confidence = TIER_CONFIDENCE_MAP.get(tier.value, "medium")
+        confidence = get_tier_meta(tier).confidence
         
         return source_url, tier, confidence
     
@@ -128,8 +123,9 @@ def get_metadata_for_tier(tier: ScrapeTier, source_url: str) -> dict:
     Returns:
         Dictionary with file_type and scrape_method
     """
-    file_type = TIER_FILE_TYPE_MAP.get(tier.value, "html")
-    scrape_method = TIER_SCRAPE_METHOD_MAP.get(tier.value, "html_parsing")
+    tier_meta = get_tier_meta(tier)
+    file_type = tier_meta.file_type
+    scrape_method = tier_meta.scrape_method
     
     # Override file_type for direct downloads if URL extension indicates
     if tier == ScrapeTier.TIER2_DIRECT_DOWNLOAD:
@@ -145,6 +141,28 @@ def get_metadata_for_tier(tier: ScrapeTier, source_url: str) -> dict:
     }
 
 
+@lru_cache(maxsize=4096)
+def _gate_source(dataset_id: str, source_url: str) -> Tuple[str, ScrapeTier, str, str, str]:
+    """
+    Resolve a source once per (dataset_id, source_url)
+
+    The gate only depends on its arguments and static configuration, so repeated
+    discovery passes reuse the result. Blocked sources raise and are not cached.
+
+    Returns:
+        Tuple of (validated_url, tier, confidence, file_type, scrape_method)
+    """
+    validated_url, tier, confidence = resolve_source(dataset_id, source_url)
+    metadata = get_metadata_for_tier(tier, validated_url)
+    
+    logger.info(
+        f"Source gate approved: dataset_id={dataset_id}, "
+        f"url={validated_url}, tier={tier.value}, confidence={confidence}"
+    )
+    
+    return validated_url, tier, confidence, metadata["file_type"], metadata["scrape_method"]
+
+
 def validate_and_gate_source(dataset_id: str, source_url: str) -> Tuple[str, ScrapeTier, str, dict]:
     """
     Complete source gate validation
@@ -159,13 +177,7 @@ def validate_and_gate_source(dataset_id: str, source_url: str) -> Tuple[str, Scr
     Raises:
         SourceGateError: If source is blocked
     """
-    validated_url, tier, confidence = resolve_source(dataset_id, source_url)
-    metadata = get_metadata_for_tier(tier, validated_url)
-    
-    logger.info(
-        f"Source gate approved: dataset_id={dataset_id}, "
-        f"url={validated_url}, tier={tier.value}, confidence={confidence}"
-    )
-    
-    return validated_url, tier, confidence, metadata
+    validated_url, tier, confidence, file_type, scrape_method = _gate_source(dataset_id, source_url)
+    # Fresh dict per call: callers may modify it
+    return validated_url, tier, confidence, {"file_type": file_type, "scrape_method": scrape_method}
 
@@ -3,13 +3,57 @@ State and City Mapping Service
 Builds comprehensive state-city mappings from DOSM datasets and hardcoded data
 """
 import logging
-from typing import Dict, Set, Optional
+import re
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Set, Optional, Tuple
+from cachetools import LRUCache
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models.dosm_record import DOSMRecord
 
 logger = logging.getLogger(__name__)
 
 
+# Lowercase state names recognised in comma-separated address parts
+KNOWN_STATE_NAMES = frozenset([
+    "selangor", "johor", "sabah", "sarawak", "perak", "penang",
+    "kedah", "kelantan", "terengganu", "pahang", "melaka", "malacca",
+    "negeri sembilan", "perlis", "kuala lumpur", "putrajaya",
+    "labuan", "singapore"
+])
+
+# Valid Malaysian states (13 states + 3 federal territories)
+MALAYSIAN_STATES = frozenset([
+    "Selangor", "Johor", "Perak", "Kedah", "Sarawak", "Sabah",
+    "Kelantan", "Terengganu", "Pahang", "Negeri Sembilan",
+    "Melaka", "Perlis", "Penang",
+    "Kuala Lumpur", "Putrajaya", "Labuan"
+])
+
+# OSM tags holding a facility's state, in priority order
+OSM_STATE_TAGS = ("addr:state", "addr:province", "is_in:state")
+
+# Canonical state name for each known lowercase spelling, built once at import
+STATE_VARIATIONS = {
+    "Kuala Lumpur": ("kl", "wp kuala lumpur", "wilayah persekutuan kuala lumpur"),
+    "Putrajaya": ("wp putrajaya", "wilayah persekutuan putrajaya"),
+    "Labuan": ("wp labuan", "wilayah persekutuan labuan"),
+    "Negeri Sembilan": ("ns", "n.sembilan", "n.s"),
+    "Penang": ("pulau pinang",),
+}
+STATE_CANONICAL_NAMES = MappingProxyType({
+    **{state.lower(): state for state in MALAYSIAN_STATES},
+    **{variant: state for state, variants in STATE_VARIATIONS.items() for variant in variants},
+})
+
+# Comprehensive mappings keyed by DOSM record version (count, max id); records are
+# append-only per scrape, so any insert or delete yields a new key
+_mapping_cache: LRUCache = LRUCache(maxsize=4)
+_mapping_cache_lock = threading.Lock()
+
+
 def load_dosm_state_mappings(db: Session) -> Dict[str, str]:
     """
     Load state-city mappings from DOSM records in database
@@ -177,6 +221,98 @@ def get_comprehensive_city_state_mapping(db: Optional[Session] = None) -> Dict[s
     return base_mapping
 
 
+
+def get_cached_city_state_mapping(db: Session) -> Dict[str, str]:
+    """
+    Get the comprehensive city-to-state mapping, rebuilt only when DOSM records change
+
+    The returned dict is shared between callers and must not be modified.
+    """
+    try:
+        version = tuple(db.query(func.count(DOSMRecord.id), func.max(DOSMRecord.id)).one())
+    except Exception as e:
+        # No usable DOSM records table: the hardcoded mapping is all there is
+        logger.warning(f"Error checking DOSM record version: {e}")
+        db.rollback()
+        return get_comprehensive_city_state_mapping()
+    
+    with _mapping_cache_lock:
+        mapping = _mapping_cache.get(version)
+    if mapping is None:
+        mapping = get_comprehensive_city_state_mapping(db)
+        with _mapping_cache_lock:
+            _mapping_cache[version] = mapping
+    return mapping
+
+def _build_trie(words) -> dict:
+    """Character trie of words; the "" key marks the end of a word"""
+    root: dict = {}
+    for word in words:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+    return root
+
+
+def _trie_to_regex(node: dict) -> str:
+    """
+    Regex for a trie: branches are disjoint by first character, so matching walks a
+    single path (cost bounded by name length, not by the number of names) and the
+    greedy optional groups try the longest word first
+    """
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return "(?:" + body + ")?" if "" in node else body
+
+
+@lru_cache(maxsize=8)
+def _compile_city_matcher(items: Tuple[Tuple[str, str], ...]) -> Callable[[str], Optional[str]]:
+    """Compile a city-to-state mapping (in priority order) into a single-pass address matcher"""
+    items = tuple((city, state) for city, state in items if city)
+    if not items:
+        return lambda address: None
+    
+    # A trie in a lookahead reports, at every start position, the longest whole-word city
+    priority: Dict[str, Tuple[int, str]] = {}
+    for index, (city, state) in enumerate(items):
+        priority.setdefault(city, (index, state))
+    pattern = re.compile(r"(?=\b(" + _trie_to_regex(_build_trie(priority)) + r")\b)")
+    
+    # Shorter cities matching at the same position are exactly the prefixes of the longest
+    # match that end on a word boundary, so the highest-priority one is resolved up front
+    is_word = lambda char: char.isalnum() or char == "_"
+    best: Dict[str, Tuple[int, str]] = {}
+    for city in priority:
+        best[city] = min(
+            priority[city[:end]]
+            for end in range(1, len(city) + 1)
+            if city[:end] in priority and (end == len(city) or is_word(city[end - 1]) != is_word(city[end]))
+        )
+    
+    def match(address: str) -> Optional[str]:
+        found = min((best[found.group(1)] for found in pattern.finditer(address.lower())), default=None)
+        return found[1] if found else None
+    
+    return match
+
+
+def get_city_state_matcher(city_to_state_mapping: Dict[str, str]) -> Callable[[str], Optional[str]]:
+    """
+    Get a matcher returning the state of the first city in the mapping that appears
+    as a whole word in an address (same result as testing each city in order)
+    
+    Args:
+        city_to_state_mapping: Lowercase city names to state names, in priority order
+        
+    Returns:
+        Function mapping an address to a state name or None
+    """
+    return _compile_city_matcher(tuple(city_to_state_mapping.items()))
+
+
 def get_state_from_coordinates(lat: float, lng: float) -> Optional[str]:
     """
     Determine Malaysian state from coordinates using approximate bounding boxes
@@ -259,26 +395,68 @@ def normalize_state_name(state: str) -> str:
     if not state:
         return "Unknown"
     
-    state_lower = state.lower().strip()
+    # Title case for standard formatting
+    return STATE_CANONICAL_NAMES.get(state.lower().strip()) or state.title()
+
+def infer_state_from_location(
+    address: Optional[str],
+    latitude: Optional[float],
+    longitude: Optional[float],
+    match_city_state: Callable[[str], Optional[str]]
+) -> str:
+    """Infer state for a facility without state OSM tags (city mapping, address parts, coordinates)"""
+    state = "Unknown"
     
-    # Map common variations to standard names
-    state_variations = {
-        "kl": "Kuala Lumpur",
-        "wp kuala lumpur": "Kuala Lumpur",
-        "wilayah persekutuan kuala lumpur": "Kuala Lumpur",
-        "wp putrajaya": "Putrajaya",
-        "wilayah persekutuan putrajaya": "Putrajaya",
-        "wp labuan": "Labuan",
-        "wilayah persekutuan labuan": "Labuan",
-        "ns": "Negeri Sembilan",
-        "n.sembilan": "Negeri Sembilan",
-        "n.s": "Negeri Sembilan",
-        "pulau pinang": "Penang",
-    }
+    # Fallback 1: Map city name (whole words only) to state using comprehensive mapping (includes DOSM data)
+    if address:
+        state = match_city_state(address) or "Unknown"
     
-    if state_lower in state_variations:
-        return state_variations[state_lower]
+    # Fallback 2: Try to extract from address parts (last resort)
+    if state == "Unknown" and address:
+        address_parts = [p.strip() for p in address.split(",")]
+        # Only use address parsing if we have 3+ parts (likely has state info)
+        if len(address_parts) >= 3:
+            # Check if any part matches a known state name
+            for part in reversed(address_parts):
+                part_lower = part.lower().strip()
+                if part_lower in KNOWN_STATE_NAMES:
+                    state = normalize_state_name(part)
+                    break
     
-    # Title case for standard formatting
-    return state.title()
+    # Fallback 3: Use coordinates to determine state (last resort)
+    if state == "Unknown" and latitude and longitude:
+        coord_state = get_state_from_coordinates(latitude, longitude)
+        if coord_state:
+            state = coord_state
+    
+    return state
+
 
+def resolve_facility_state(
+    osm_tags: Optional[Dict[str, Any]],
+    address: Optional[str],
+    latitude: Optional[float],
+    longitude: Optional[float],
+    match_city_state: Callable[[str], Optional[str]]
+) -> Optional[str]:
+    """
+    Resolve the Malaysian state stored on a facility row
+    
+    OSM state tags win; otherwise the state is inferred from address and coordinates.
+    
+    Args:
+        osm_tags: Facility OSM tags
+        address: Facility address
+        latitude: Facility latitude
+        longitude: Facility longitude
+        match_city_state: Address matcher from get_city_state_matcher
+        
+    Returns:
+        One of MALAYSIAN_STATES, or None if the facility is outside Malaysia or unresolved
+    """
+    raw_state = next((osm_tags[tag] for tag in OSM_STATE_TAGS if osm_tags and osm_tags.get(tag)), None)
+    if raw_state:
+        state = normalize_state_name(str(raw_state))
+    else:
+        state = infer_state_from_location(address, latitude, longitude, match_city_state)
+    return state if state in MALAYSIAN_STATES else None
@@ -6,7 +6,6 @@ import hashlib
 import json
 import logging
 from typing import Optional, Dict, Any, List, Tuple
-from datetime import datetime
 from sqlalchemy.orm import Session
 from app.models.dataset_version import DatasetVersion
 from app.models.dosm_dataset import DOSMDataset
@@ -14,7 +13,7 @@ from app.models.dosm_dataset import DOSMDataset
 logger = logging.getLogger(__name__)
 
 
-def calculate_file_hash(content: bytes) -> str:
+def calculate_file_hash(content: bytes) -> bytes:
     """
     Calculate SHA-256 hash of file content
     
@@ -22,9 +21,9 @@ def calculate_file_hash(content: bytes) -> str:
         content: File content as bytes
         
     Returns:
-        SHA-256 hash as hex string
+        Raw 32-byte SHA-256 digest
     """
-    return hashlib.sha256(content).hexdigest()
+    return hashlib.sha256(content).digest()
 
 
 def calculate_schema_fingerprint(records: List[Dict[str, Any]]) -> str:
@@ -84,7 +83,7 @@ def calculate_schema_fingerprint(records: List[Dict[str, Any]]) -> str:
 def check_version_exists(
     db: Session,
     dataset_id: str,
-    file_hash: str
+    file_hash: bytes
 ) -> Optional[DatasetVersion]:
     """
     Check if a version with the given hash already exists
@@ -125,7 +124,7 @@ def get_latest_version(
 def create_version(
     db: Session,
     dataset_id: str,
-    file_hash: str,
+    file_hash: bytes,
     schema_fingerprint: Optional[str],
     record_count: int,
     file_size: Optional[int] = None
@@ -154,17 +153,17 @@ def create_version(
         schema_fingerprint=schema_fingerprint,
         version_number=next_version,
         record_count=record_count,
-        file_size=file_size,
-        retrieved_at=datetime.utcnow()
+        file_size=file_size
     )
     
+    # Flushed, not committed: the caller commits the version together with its records,
+    # so a failed scrape can't leave a version that makes the next run skip the content
     db.add(version)
-    db.commit()
-    db.refresh(version)
+    db.flush()
     
     logger.info(
         f"Created new version for dataset {dataset_id}: "
-        f"version={next_version}, hash={file_hash[:8]}..., records={record_count}"
+        f"version={next_version}, hash={file_hash.hex()[:8]}..., records={record_count}"
     )
     
     return version
@@ -173,7 +172,7 @@ def create_version(
 def is_duplicate_version(
     db: Session,
     dataset_id: str,
-    file_hash: str
+    file_hash: bytes
 ) -> bool:
     """
     Check if a version with this hash already exists (duplicate)
@@ -214,12 +213,12 @@ def track_dataset_version(
     schema_fingerprint = calculate_schema_fingerprint(records) if records else None
     
     # Check if this version already exists
-    if not force and is_duplicate_version(db, dataset_id, file_hash):
+    existing = None if force else check_version_exists(db, dataset_id, file_hash)
+    if existing is not None:
         logger.info(
             f"Duplicate version detected for dataset {dataset_id}: "
-            f"hash={file_hash[:8]}... (skipping)"
+            f"hash={file_hash.hex()[:8]}... (skipping)"
         )
-        existing = check_version_exists(db, dataset_id, file_hash)
         return False, existing
     
     # Create new version
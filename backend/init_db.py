@@ -2,12 +2,12 @@
 Database initialization script
 Creates database tables if they don't exist
 """
-from app.database import engine, Base
+from app.database import get_engine, Base
 from app.models import ETLJob, DOSMDataset, DOSMRecord, DatasetVersion, Facility
 
 if __name__ == "__main__":
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     print("Database tables created successfully!")
     print("Created tables:")
     print("  - etl_jobs")
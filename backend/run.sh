@@ -16,5 +16,5 @@ python init_db.py
 
 # Start the server
 echo "Starting FastAPI server..."
-uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
+uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 --loop uvloop --http httptools
 
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Backfill script for the facilities.state column
+Resolves state for existing facilities with the same logic the ETL job uses
+
+For databases created before the column existed, run first:
+    python scripts/upgrade_schema.py
+
+Usage (from backend/):
+    python scripts/backfill_facility_state.py [--all]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from sqlalchemy import insert, select, update
+
+from app.database import SessionLocal, get_engine
+from app.models.etl_job import ETLJob
+from app.models.facility import Facility
+from app.schemas.etl_job import ETLJobStatus
+from app.services.state_mapping import (
+    OSM_STATE_TAGS,
+    get_city_state_matcher,
+    get_comprehensive_city_state_mapping,
+    resolve_facility_state,
+)
+
+BATCH_SIZE = 1000
+
+
+def backfill_states(recompute_all: bool = False) -> int:
+    """Resolve and store state for facilities (only rows without one unless recompute_all)"""
+    db = SessionLocal(bind=get_engine())
+    try:
+        match_city_state = get_city_state_matcher(get_comprehensive_city_state_mapping(db))
+
+        # Only the state tags are projected (as text), not the whole JSONB document
+        state_tags = [Facility.osm_tags[tag].astext.label(tag) for tag in OSM_STATE_TAGS]
+        stmt = select(
+            Facility.id, Facility.address, Facility.latitude, Facility.longitude, *state_tags
+        ).order_by(Facility.id)
+        if not recompute_all:
+            stmt = stmt.where(Facility.state.is_(None))
+
+        # Resolve everything first so updates don't disturb the streaming read
+        updates = [
+            {"id": row["id"], "state": resolve_facility_state(
+                {tag: row[tag] for tag in OSM_STATE_TAGS},
+                row["address"], row["latitude"], row["longitude"], match_city_state
+            )}
+            for row in db.execute(stmt.execution_options(yield_per=BATCH_SIZE)).mappings()
+        ]
+
+        for start in range(0, len(updates), BATCH_SIZE):
+            db.execute(update(Facility), updates[start:start + BATCH_SIZE])
+            db.commit()
+            print(f"  Updated {min(start + BATCH_SIZE, len(updates))}/{len(updates)} facilities")
+
+        if updates:
+            # Record the backfill in the ETL job history (the updates bump each row's
+            # updated_at, which already moves the facility data version)
+            db.execute(insert(ETLJob).values(
+                source="facility_state_backfill",
+                status=ETLJobStatus.COMPLETED.value,
+                records_processed=len(updates)
+            ))
+            db.commit()
+
+        return len(updates)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    count = backfill_states(recompute_all="--all" in sys.argv[1:])
+    print(f"Backfilled state for {count} facilities")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Upgrade script for databases created before the current schema
+init_db.py (create_all) only creates missing tables and never alters existing ones,
+so this applies the column changes and creates any missing indexes. Safe to re-run:
+each change is skipped once applied.
+
+Usage (from backend/):
+    python scripts/upgrade_schema.py
+then, if facilities were stored before the state column existed:
+    python scripts/backfill_facility_state.py
+"""
+import sys
+sys.path.insert(0, '.')
+
+from sqlalchemy import text
+
+from app.database import Base, POSTGIS_CHECK_SQL, get_engine
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.models.facility import FACILITY_POINT_INDEX_SQL
+
+COLUMN_TYPE_SQL = text(
+    "SELECT data_type FROM information_schema.columns "
+    "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+)
+
+# Columns added to existing tables
+NEW_COLUMNS = [
+    "ALTER TABLE facilities ADD COLUMN IF NOT EXISTS state VARCHAR(64)",
+]
+
+# (table, column, previous data_type, conversion); applied only while the column has the previous type
+TYPE_CHANGES = [
+    ("dosm_records", "data", "json",
+     "ALTER TABLE dosm_records ALTER COLUMN data TYPE jsonb USING data::jsonb"),
+    ("dosm_records", "record_metadata", "json",
+     "ALTER TABLE dosm_records ALTER COLUMN record_metadata TYPE jsonb USING record_metadata::jsonb"),
+    ("facilities", "osm_tags", "json",
+     "ALTER TABLE facilities ALTER COLUMN osm_tags TYPE jsonb USING osm_tags::jsonb"),
+    ("dataset_versions", "file_hash", "character varying",
+     "ALTER TABLE dataset_versions ALTER COLUMN file_hash TYPE bytea USING decode(file_hash, 'hex')"),
+]
+
+# Indexes superseded by ones defined on the models
+OBSOLETE_INDEXES = [
+    "idx_etljobs_created_desc",  # Replaced by idx_etljobs_created_source
+]
+
+
+def upgrade_schema() -> None:
+    """Bring an existing database up to the models' schema in one transaction"""
+    with get_engine().begin() as conn:
+        for statement in NEW_COLUMNS:
+            conn.execute(text(statement))
+
+        for table, column, previous_type, statement in TYPE_CHANGES:
+            if conn.execute(COLUMN_TYPE_SQL, {"table": table, "column": column}).scalar() == previous_type:
+                print(f"  Converting {table}.{column} from {previous_type}")
+                conn.execute(text(statement))
+
+        for name in OBSOLETE_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if not conn.dialect.has_index(conn, table.name, index.name):
+                    print(f"  Creating index {index.name} on {table.name}")
+                    index.create(conn)
+
+        if conn.execute(POSTGIS_CHECK_SQL).scalar():
+            conn.execute(text(FACILITY_POINT_INDEX_SQL))
+
+
+if __name__ == "__main__":
+    print("Upgrading database schema...")
+    upgrade_schema()
+    print("Database schema is up to date")
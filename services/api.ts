@@ -231,18 +231,15 @@ export const etlApi = {
 
   /**
    * Trigger facility ETL job to fetch and store facilities from Overpass API
-   * This is a long-running operation (10-30+ seconds) that fetches fresh data
-   * from Overpass API and stores it in the database.
+   * The job (10-30+ seconds) runs in the background; the backend responds with
+   * 202 Accepted right away. Poll the ETL job by ID for its final status.
    * 
    * @param bbox Optional bounding box as "south,west,north,east"
    */
-  async triggerFacilityETL(bbox?: string): Promise<{ etl_job_id: number; result: any; message: string }> {
+  async triggerFacilityETL(bbox?: string): Promise<{ etl_job_id: number; status: string; message: string }> {
     try {
       const params = bbox ? { bbox } : {};
-      const response = await api.post('/etl-jobs/overpass-facilities', null, {
-        params,
-        timeout: 120000,  // 2 minutes timeout for long-running ETL job
-      });
+      const response = await api.post('/etl-jobs/overpass-facilities', null, { params });
       return response.data;
     } catch (error: any) {
       console.error('Error triggering facility ETL job:', error);